@@ -1,11 +1,24 @@
 # ai_assistant.py
 import streamlit as st
+import os
 import requests
 import json
+import re
+import hashlib
+import time
 from datetime import datetime
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 from langdetect import detect
+import archive
+import chat_export
+import chat_log
+import prefetch
+from chat_cache import ChatEntry, get_chat_cache, load_archived_chats
+from chat_session import ChatSession
+from mirror import mirrored
+from singleflight import SingleFlight
+from model_router import router
 
 # ------------------- GOOGLE SHEET SETUP -------------------
 SCOPE = [
@@ -20,61 +33,105 @@ def connect_google_sheet():
         creds_dict = json.loads(creds_json)
         creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
         client = gspread.authorize(creds)
-        return client.open("User").worksheet("ai data")
+        return mirrored(client.open("User").worksheet("ai data"))
     except Exception as e:
         st.warning(f"⚠️ Google Sheet connection failed: {e}")
         return None
 
 sheet = connect_google_sheet()
 GOOGLE_SHEET_ENABLED = sheet is not None
+CHAT_LOG_ENABLED = chat_log.enabled()  # chats go to the local log instead of the sheet
+
+GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+# Identical questions asked at the same time share one Groq request
+ai_flight = SingleFlight("ai.ask")
 
 # ------------------- HELPER FUNCTIONS -------------------
+def groq_setting(name, default=None):
+    """Read a Groq setting from the environment, then st.secrets"""
+    if os.environ.get(name):
+        return os.environ[name]
+    try:
+        return st.secrets.get(name, default)
+    except Exception:
+        return default
+
 def detect_language(text):
     try:
         return detect(text)
     except:
         return "en"
 
+def fetch_history(username, topic, with_archive=False):
+    """Load one topic's entries from the shared chat cache (and the archive)"""
+    entries = []
+    try:
+        if CHAT_LOG_ENABLED:
+            entries = chat_log.get_chat_log().entries(username, topic)
+        else:
+            entries = get_chat_cache(sheet).entries(username, topic)
+    except Exception as e:
+        st.warning(f"⚠️ Failed to load chats: {e}")
+    if with_archive:
+        entries = load_archived_chats(username).get(topic, []) + entries
+    return entries
+
 def load_user_chats(username):
-    """Load all chats for a username from Google Sheet"""
-    if not GOOGLE_SHEET_ENABLED:
-        return {}
+    """Load a username's topic index; conversations are fetched on demand"""
+    counts = {}
     try:
-        rows = sheet.get_all_records()
-        user_chats = {}
-        for row in rows:
-            if str(row.get("username", "")).strip().lower() == username.strip().lower():
-                topic = row.get("topic", "Untitled").strip()
-                if topic not in user_chats:
-                    user_chats[topic] = []
-                user_chats[topic].append({
-                    "timestamp": row.get("timestamp", ""),
-                    "question": row.get("question", ""),
-                    "answer": row.get("answer", "")
-                })
-        return user_chats
+        if CHAT_LOG_ENABLED:
+            counts = chat_log.get_chat_log().topic_counts(username)
+        elif GOOGLE_SHEET_ENABLED:
+            counts = get_chat_cache(sheet).topic_counts(username)
     except Exception as e:
         st.warning(f"⚠️ Failed to load chats: {e}")
-        return {}
+    stored = CHAT_LOG_ENABLED or GOOGLE_SHEET_ENABLED
+    return ChatSession(username, counts, fetch_history if stored else None)
+
+def chat_session(username, wait=True):
+    """
+    This session's ChatSession for `username`, created on first use (or
+    taken from the post-login prefetch, waiting briefly for it if it is
+    still running). With wait=False, returns None instead of waiting.
+    """
+    chats = st.session_state.get("user_chats")
+    if not isinstance(chats, ChatSession) or chats.username != username:
+        chats = prefetch.take("chats", username, prefetch.TAKE_WAIT if wait else 0)
+        if chats is None:
+            if not wait and prefetch.warming(username):
+                return None
+            chats = load_user_chats(username)
+        st.session_state.user_chats = chats
+    return chats
 
 def save_chat(username, topic, question, answer):
-    """Append a chat to Google Sheet"""
+    """Append a chat to the local chat log, or else the Google Sheet"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+    if CHAT_LOG_ENABLED:
+        try:
+            chat_log.get_chat_log().append(username, topic, timestamp, question, answer)
+        except OSError as e:
+            st.warning(f"⚠️ Failed to save chat: {e}")
+        return
     if not GOOGLE_SHEET_ENABLED:
         return
     try:
         sheet.append_row([
             username,
-            datetime.now().strftime("%Y-%m-%d %H:%M"),
+            timestamp,
             topic,
             question,
             answer
         ])
+        get_chat_cache(sheet).invalidate()
     except Exception as e:
         st.warning(f"⚠️ Failed to save chat: {e}")
 
 def generate_topic(question, answer, existing_topics):
     """Generate a short topic from question and answer"""
-    api_key = st.secrets.get("GROQ_API_KEY")
+    api_key = groq_setting("GROQ_API_KEY")
     prompt = f"Provide a short 3-5 word topic in English summarizing this chat:\nQ: {question}\nA: {answer}"
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"} if api_key else {}
     data = {
@@ -89,7 +146,7 @@ def generate_topic(question, answer, existing_topics):
     if api_key:
         try:
             resp = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
+                groq_setting("GROQ_API_URL", GROQ_API_URL),
                 headers=headers,
                 json=data,
                 timeout=15
@@ -105,9 +162,18 @@ def generate_topic(question, answer, existing_topics):
             return existing
     return topic
 
+def normalize_text(text):
+    return re.sub(r"\s+", " ", str(text or "")).strip().lower()
+
+def question_key(question, history):
+    """Key identifying a prompt: normalized question plus its chat context"""
+    context = [(normalize_text(m["question"]), normalize_text(m["answer"])) for m in history]
+    payload = json.dumps([normalize_text(question), context], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 def ask_ai(question, history):
     """Ask AI using Groq API"""
-    api_key = st.secrets.get("GROQ_API_KEY")
+    api_key = groq_setting("GROQ_API_KEY")
     if not api_key:
         return "❌ Missing API Key", "None"
 
@@ -117,21 +183,35 @@ def ask_ai(question, history):
         conversation.append({"role": "assistant", "content": msg["answer"]})
     conversation.append({"role": "user", "content": question})
 
-    models = ["llama-3.1-70b-versatile", "llama-3.1-8b-instant"]
+    return ai_flight.do(
+        question_key(question, history),
+        lambda: request_answer(conversation, api_key, router.choose(question, history))
+    )
+
+def request_answer(conversation, api_key, models):
+    """Send a conversation to Groq, falling back through the model list"""
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
 
     for model in models:
+        start = time.perf_counter()
+        answer, tokens = None, 0
         try:
             resp = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
+                groq_setting("GROQ_API_URL", GROQ_API_URL),
                 headers=headers,
                 json={"model": model, "messages": conversation},
                 timeout=30
             )
             if resp.status_code == 200:
-                return resp.json()["choices"][0]["message"]["content"].strip(), model
+                body = resp.json()
+                answer = body["choices"][0]["message"]["content"].strip()
+                tokens = body.get("usage", {}).get("completion_tokens", 0)
         except:
-            continue
+            answer = None
+        # One record per attempt: a 200 with an unreadable body is a failure
+        router.record(model, time.perf_counter() - start, answer is not None, tokens)
+        if answer is not None:
+            return answer, model
     return "❌ AI request failed", "None"
 
 
@@ -147,26 +227,26 @@ def app():
     username = st.session_state.user["username"]
 
     # ---------------- Load User Chats ----------------
-    if GOOGLE_SHEET_ENABLED and not st.session_state.get("user_chats"):
-        st.session_state.user_chats = load_user_chats(username)
+    chats = chat_session(username)
 
-    # ---------------- Session Variables ----------------
-    if "current_topic" not in st.session_state or st.session_state.current_topic is None:
-        st.session_state.current_topic = "New Chat"
+    # ---------------- Archived Chats (read only on request) ----------------
+    if archive.archived_count("ai data") and not chats.with_archive:
+        if st.button("📦 Load older chats from the archive"):
+            archived = load_archived_chats(username)
+            chats.include_archive({old_topic: len(entries) for old_topic, entries in archived.items()})
+            st.rerun()
 
-    topic = st.session_state.current_topic
-
-    # Load existing chat history if not already loaded
-    if topic != "New Chat" and not st.session_state.get("ai_history"):
-        st.session_state.ai_history = st.session_state.user_chats.get(topic, []).copy()
-    elif topic == "New Chat" and "ai_history" not in st.session_state:
-        st.session_state.ai_history = []
+    # ---------------- Session Variables ----------------
+    # current_topic None means a new, not yet saved chat
+    current = st.session_state.get("current_topic")
+    topic = current or "New Chat"
+    history = chats.history(current) if current else []
 
     st.subheader(f"📘 Topic: {topic}")
 
     # ---------------- Display Chat History ----------------
-    if st.session_state.ai_history:
-        for msg in st.session_state.get('ai_history', []):
+    if history:
+        for msg in history:
             st.markdown(
                 f"""
                 <div class="chat-container">
@@ -181,6 +261,32 @@ def app():
     else:
         st.info("💬 Start chatting below!")
 
+    # ---------------- Export Chats ----------------
+    if chats:
+        with st.expander("⬇️ Export my chat history"):
+            fmt = st.radio(
+                "Format", list(chat_export.FORMATS), horizontal=True, key="export_format",
+                format_func={"csv": "CSV", "jsonl": "JSON Lines", "md": "Markdown"}.get
+            )
+            url = chat_export.export_url(username, fmt)
+            if url:
+                # The export server streams the file as it is generated
+                st.link_button("⬇️ Download", url)
+            elif st.button("Prepare download", key="export_prepare"):
+                try:
+                    data = chat_export.inline_export(
+                        username, fmt, chats.topic_names(), lambda t: fetch_history(username, t)
+                    )
+                except chat_export.ExportTooLarge:
+                    st.warning(f"⚠️ Your chat history is larger than {chat_export.INLINE_LIMIT // (1024 * 1024)} MB, "
+                               "too large to prepare here. Please ask the site administrator to enable "
+                               "streamed exports.")
+                else:
+                    st.download_button(
+                        "⬇️ Download", data, file_name=chat_export.file_name(username, fmt),
+                        mime=chat_export.FORMATS[fmt][0], on_click="ignore"
+                    )
+
     # ---------------- Chat Input ----------------
     user_input = st.chat_input("💬 Type your question here...")
 
@@ -191,30 +297,21 @@ def app():
         question = st.session_state.pop("pending_input")
 
         # ---------------- Ask AI ----------------
-        history = st.session_state.ai_history.copy()
-        answer, _ = ask_ai(question, history)
+        answer, _ = ask_ai(question, list(history))
 
-        chat_entry = {
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "question": question,
-            "answer": answer
-        }
+        chat_entry = ChatEntry(datetime.now().strftime("%Y-%m-%d %H:%M"), question, answer)
 
         # ---------------- New Topic Handling ----------------
-        if topic == "New Chat" or len(st.session_state.ai_history) == 0:
-            new_topic = generate_topic(question, answer, list(st.session_state.user_chats.keys()))
-            st.session_state.user_chats[new_topic] = []
-            st.session_state.current_topic = new_topic
-            st.session_state.ai_history = []  # start clean
-            topic = new_topic
+        if not history:
+            topic = generate_topic(question, answer, chats.topic_names())
+            chats.start_topic(topic)
+            st.session_state.current_topic = topic
 
         # ---------------- Append to Current Topic ----------------
-        st.session_state.ai_history.append(chat_entry)
-        st.session_state.user_chats.setdefault(topic, []).append(chat_entry)
+        chats.append(topic, chat_entry)
 
-        # ---------------- Save to Google Sheet ----------------
-        if GOOGLE_SHEET_ENABLED:
-            save_chat(username, topic, question, answer)
+        # ---------------- Save Chat ----------------
+        save_chat(username, topic, question, answer)
 
         # ---------------- Display Instantly ----------------
         with st.chat_message("user"):
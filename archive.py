@@ -0,0 +1,263 @@
+# archive.py
+"""
+Hot/cold archival for the worksheets that grow forever.
+
+Rows older than --days are moved out of the hot sheet, either into gzip
+JSONL segment files under KISSAN_ARCHIVE_DIR (default "archive/") or into a
+"<sheet> Archive" worksheet, and then deleted from the hot sheet. A local
+manifest per sheet records the segments so pages can read archived rows
+back when a user pages past the oldest hot row.
+
+    python archive.py --days 180                  # all sheets, local segments
+    python archive.py --sheet Sheet3 --days 90 --target sheet
+
+Deleting rows shifts hot row numbers; the app notices through the manifest
+generation and re-reads its row cursors. Run it on the app host.
+"""
+import argparse
+import gzip
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import gspread
+import streamlit as st
+from oauth2client.service_account import ServiceAccountCredentials
+
+import shared_cache
+
+# ---------- GOOGLE CONFIG ----------
+SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive"
+]
+
+ARCHIVE_DIR = os.environ.get("KISSAN_ARCHIVE_DIR", "archive")
+SEGMENT_ROWS = 5000  # rows per segment file / append_rows batch
+TIME_FORMATS = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"]
+
+# Worksheet -> name of the column holding the row's timestamp
+ARCHIVED_SHEETS = {
+    "Sheet3": "time",        # messages
+    "Sheet4": "time",        # comments
+    "ai data": "timestamp",  # AI chats
+}
+
+_manifest_lock = threading.Lock()
+
+
+# ---------- CONNECT ----------
+def connect_worksheet(sheet_name, create=False, header=None):
+    try:
+        creds_json = st.secrets["google"]["secrets_creds"]
+        creds_dict = json.loads(creds_json)
+        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
+        client = gspread.authorize(creds)
+        book = client.open("User")
+        try:
+            return book.worksheet(sheet_name)
+        except gspread.WorksheetNotFound:
+            if not create:
+                raise
+            ws = book.add_worksheet(sheet_name, rows=1, cols=max(len(header or []), 1))
+            if header:
+                ws.update([header], "A1")
+            return ws
+    except Exception as e:
+        st.warning(f"⚠️ Could not connect to {sheet_name}: {e}")
+        return None
+
+
+# ---------- MANIFEST ----------
+def sheet_dir(sheet_name):
+    return os.path.join(ARCHIVE_DIR, sheet_name.replace(" ", "_"))
+
+
+def manifest_path(sheet_name):
+    return os.path.join(sheet_dir(sheet_name), "manifest.json")
+
+
+def load_manifest(sheet_name):
+    try:
+        with open(manifest_path(sheet_name), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"header": [], "segments": [], "rows": 0, "generation": 0}
+
+
+def save_manifest(sheet_name, manifest):
+    os.makedirs(sheet_dir(sheet_name), exist_ok=True)
+    tmp = manifest_path(sheet_name) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, manifest_path(sheet_name))
+
+
+def generation(sheet_name):
+    """Bumped every time rows are removed from the hot sheet."""
+    return load_manifest(sheet_name).get("generation", 0)
+
+
+def archived_count(sheet_name):
+    return load_manifest(sheet_name).get("rows", 0)
+
+
+# ---------- ARCHIVAL JOB ----------
+def parse_time(value):
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def old_prefix(rows, time_index, cutoff):
+    """Number of leading rows older than cutoff (rows are in append order)."""
+    count = 0
+    for row in rows:
+        stamp = parse_time(row[time_index]) if len(row) > time_index else None
+        if stamp is None or stamp >= cutoff:
+            break
+        count += 1
+    return count
+
+
+def write_segments(sheet_name, manifest, rows):
+    os.makedirs(sheet_dir(sheet_name), exist_ok=True)
+    for start in range(0, len(rows), SEGMENT_ROWS):
+        chunk = rows[start:start + SEGMENT_ROWS]
+        first = manifest["rows"]
+        name = f"seg-{first:09d}-{first + len(chunk) - 1:09d}.jsonl.gz"
+        path = os.path.join(sheet_dir(sheet_name), name)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            for row in chunk:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        with open(path, "rb") as f:
+            os.fsync(f.fileno())
+        manifest["segments"].append({"file": name, "first": first, "rows": len(chunk)})
+        manifest["rows"] += len(chunk)
+
+
+def write_archive_sheet(sheet_name, manifest, header, rows):
+    ws = connect_worksheet(f"{sheet_name} Archive", create=True, header=header)
+    if ws is None:
+        raise RuntimeError(f"Archive worksheet for {sheet_name} unavailable")
+    for start in range(0, len(rows), SEGMENT_ROWS):
+        chunk = rows[start:start + SEGMENT_ROWS]
+        ws.append_rows(chunk, value_input_option="RAW")
+        manifest["segments"].append({"sheet": f"{sheet_name} Archive", "first": manifest["rows"], "rows": len(chunk)})
+        manifest["rows"] += len(chunk)
+
+
+def archive_sheet(sheet_name, days, target="local", dry_run=False):
+    """Move rows older than `days` out of a hot sheet. Returns rows moved."""
+    ws = connect_worksheet(sheet_name)
+    if ws is None:
+        return 0
+    values = ws.get_values()
+    if len(values) < 2:
+        return 0
+    header = [str(h).strip() for h in values[0]]
+    time_column = ARCHIVED_SHEETS[sheet_name]
+    if time_column not in header:
+        raise ValueError(f"{sheet_name} has no '{time_column}' column")
+    cutoff = datetime.now() - timedelta(days=days)
+    count = old_prefix(values[1:], header.index(time_column), cutoff)
+    if count == 0 or dry_run:
+        return count
+
+    rows = [list(row) + [""] * (len(header) - len(row)) for row in values[1:count + 1]]
+    with _manifest_lock:
+        manifest = load_manifest(sheet_name)
+        manifest["header"] = manifest["header"] or header
+        if target == "sheet":
+            write_archive_sheet(sheet_name, manifest, header, rows)
+        else:
+            write_segments(sheet_name, manifest, rows)
+        # Rows are durable in the archive before they leave the hot sheet
+        save_manifest(sheet_name, manifest)
+        ws.delete_rows(2, count + 1)
+        manifest["generation"] = manifest.get("generation", 0) + 1
+        save_manifest(sheet_name, manifest)
+    shared_cache.notify(sheet_name)  # replicas must not serve pre-archive snapshots
+    return count
+
+
+# ---------- READING ----------
+@lru_cache(maxsize=8)
+def read_segment(path, mtime):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@lru_cache(maxsize=8)
+def read_sheet_segment(sheet_name, first_row, last_row, generation):
+    """Rows of an archive sheet; `generation` only keys the cache, so a new archival run rereads them."""
+    ws = connect_worksheet(sheet_name)
+    if ws is None:
+        return []
+    return ws.get_values(f"A{first_row}:Z{last_row}")
+
+
+def segment_rows(sheet_name, segment, generation=0):
+    if "sheet" in segment:
+        first_row = segment["first"] + 2  # archive sheet row 1 is the header
+        return read_sheet_segment(segment["sheet"], first_row, first_row + segment["rows"] - 1, generation)
+    path = os.path.join(sheet_dir(sheet_name), segment["file"])
+    return read_segment(path, os.path.getmtime(path))
+
+
+def load_archived(sheet_name, offset=0, limit=None):
+    """
+    Archived rows as dicts, newest first, skipping `offset` rows.
+    Only the segments overlapping the requested window are read.
+    """
+    manifest = load_manifest(sheet_name)
+    header = manifest["header"]
+    total = manifest["rows"]
+    end = total - offset                      # exclusive, chronological index
+    start = 0 if limit is None else max(0, end - limit)
+    result = []
+    for segment in reversed(manifest["segments"]):
+        seg_first, seg_end = segment["first"], segment["first"] + segment["rows"]
+        if seg_end <= start or seg_first >= end:
+            continue
+        rows = segment_rows(sheet_name, segment, manifest.get("generation", 0))
+        for i in range(min(end, seg_end) - 1, max(start, seg_first) - 1, -1):
+            values = list(rows[i - seg_first]) + [""] * len(header)
+            result.append(dict(zip(header, values)))
+    return result
+
+
+def iter_archived(sheet_name):
+    """Every archived row as a dict, oldest first, one segment at a time."""
+    manifest = load_manifest(sheet_name)
+    header = manifest["header"]
+    for segment in manifest["segments"]:
+        for row in segment_rows(sheet_name, segment, manifest.get("generation", 0)):
+            yield dict(zip(header, list(row) + [""] * len(header)))
+
+
+# ---------- CLI ----------
+def main():
+    parser = argparse.ArgumentParser(description="Move old rows out of the hot worksheets")
+    parser.add_argument("--sheet", action="append", choices=list(ARCHIVED_SHEETS),
+                        help="worksheet to archive (repeatable, default: all)")
+    parser.add_argument("--days", type=int, default=180, help="archive rows older than this many days")
+    parser.add_argument("--target", choices=["local", "sheet"], default="local")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    for sheet_name in args.sheet or list(ARCHIVED_SHEETS):
+        moved = archive_sheet(sheet_name, args.days, args.target, args.dry_run)
+        action = "would move" if args.dry_run else "moved"
+        print(f"{sheet_name}: {action} {moved} row(s) older than {args.days} days")
+
+
+if __name__ == "__main__":
+    main()
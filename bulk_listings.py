@@ -0,0 +1,110 @@
+# bulk_listings.py
+import csv
+import io
+import math
+import uuid
+from datetime import datetime
+
+from market_index import to_number
+
+# ---------------- SETTINGS ----------------
+BULK_CHUNK_ROWS = 200     # listings per append_rows call
+MAX_BULK_ROWS = 5000      # listings accepted from one file
+MAX_REPORTED_ERRORS = 20
+TEMPLATE_COLUMNS = ["Crop Name", "Quantity (kg)", "Price (₹/kg)", "Location"]
+
+# Accepted CSV headers (lowercased) -> field
+HEADER_ALIASES = {
+    "crop": "crop", "crop name": "crop",
+    "quantity": "quantity", "quantity (kg)": "quantity", "qty": "quantity",
+    "price": "price", "price (₹/kg)": "price", "price (rs/kg)": "price", "price per kg": "price",
+    "location": "location", "address": "location",
+}
+
+
+def template_csv():
+    return ",".join(TEMPLATE_COLUMNS) + "\nPaddy,500,24,\n"
+
+
+# ---------------- VALIDATION ----------------
+def validate_row(row):
+    """(crop, quantity, price, location) for one CSV row, or raise ValueError."""
+    crop = str(row.get("crop") or "").strip()
+    if not crop:
+        raise ValueError("crop name is missing")
+    quantity = to_number(row.get("quantity"))
+    if not (math.isfinite(quantity) and quantity >= 1 and quantity == int(quantity)):
+        raise ValueError(f"quantity must be a whole number of kg, got '{row.get('quantity')}'")
+    price = to_number(row.get("price"))
+    if not (math.isfinite(price) and price > 0):
+        raise ValueError(f"price must be positive, got '{row.get('price')}'")
+    price = int(price) if price == int(price) else round(price, 2)
+    return crop, int(quantity), price, str(row.get("location") or "").strip()
+
+
+def parse_listings(file, seller):
+    """
+    Read an uploaded CSV in one streaming pass.
+
+    `seller` is {"username", "address", "phone", "email"}; rows without a
+    Location fall back to the seller's address. Returns (sheet rows, errors)
+    where errors are "line N: reason" strings (at most MAX_REPORTED_ERRORS).
+    """
+    file.seek(0)
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        return read_listings(csv.reader(text), seller)
+    except UnicodeDecodeError:
+        return [], ["the file is not UTF-8 encoded CSV"]
+    finally:
+        text.detach()  # leave the upload open for the next rerun
+
+
+def read_listings(reader, seller):
+    header = next(reader, None)
+    if not header:
+        return [], ["the file is empty"]
+    fields = [HEADER_ALIASES.get(h.strip().lower()) for h in header]
+    missing = {"crop", "quantity", "price"} - set(fields)
+    if missing:
+        return [], [f"missing column(s): {', '.join(sorted(missing))}"]
+
+    posted_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows, errors, error_count, truncated = [], [], 0, False
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        if len(rows) + error_count >= MAX_BULK_ROWS:
+            truncated = True
+            break
+        try:
+            crop, quantity, price, location = validate_row(
+                {field: value for field, value in zip(fields, values) if field})
+        except ValueError as e:
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"line {reader.line_num}: {e}")
+            continue
+        rows.append([seller["username"], crop, quantity, price, location or seller["address"],
+                     seller["phone"], seller["email"], uuid.uuid4().hex[:12], 0, posted_at])
+    if error_count > len(errors):
+        errors.append(f"... and {error_count - len(errors)} more invalid row(s)")
+    if truncated:
+        errors.append(f"only the first {MAX_BULK_ROWS} listings of a file are accepted")
+    return rows, errors
+
+
+# ---------------- UPLOAD ----------------
+def upload_listings(sheet, rows, progress=None, done=0):
+    """
+    Append listing rows in chunks of BULK_CHUNK_ROWS, one request per chunk,
+    skipping the first `done` rows (posted by an earlier, interrupted upload).
+    `progress(done, total)` is called after each chunk. Returns rows written.
+    """
+    for start in range(done, len(rows), BULK_CHUNK_ROWS):
+        chunk = rows[start:start + BULK_CHUNK_ROWS]
+        sheet.append_rows(chunk)
+        done += len(chunk)
+        if progress:
+            progress(done, len(rows))
+    return done
@@ -0,0 +1,164 @@
+# chat_cache.py
+import sys
+import threading
+import time
+
+import streamlit as st
+
+import archive
+import shared_cache
+
+# ------------------- SETTINGS -------------------
+CHAT_COLUMNS = ["username", "timestamp", "topic", "question", "answer"]
+REFRESH_INTERVAL = 60  # seconds before rows appended by other processes are picked up
+ARCHIVE_CACHE_USERS = 64  # users whose archived chats are kept ready
+TOPIC = "ai data"  # shared-cache topic announced on every saved chat
+
+
+def user_key(username):
+    return str(username or "").strip().lower()
+
+
+# ------------------- CHAT ENTRY -------------------
+class ChatEntry:
+    """
+    One saved Q&A. Slotted, with interned timestamps, because every session
+    viewing a topic shares these objects instead of holding its own dicts.
+    Supports entry["question"] so code written for dict entries keeps working.
+    """
+
+    __slots__ = ("timestamp", "question", "answer")
+
+    def __init__(self, timestamp, question, answer):
+        self.timestamp = sys.intern(str(timestamp or ""))
+        self.question = str(question or "")
+        self.answer = str(answer or "")
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def to_dict(self):
+        return {"timestamp": self.timestamp, "question": self.question, "answer": self.answer}
+
+    def __repr__(self):
+        return f"ChatEntry({self.timestamp!r}, {self.question[:30]!r})"
+
+
+def make_entry(row):
+    return ChatEntry(row.get("timestamp", ""), row.get("question", ""), row.get("answer", ""))
+
+
+# ------------------- CHAT CACHE -------------------
+class ChatCache:
+    """
+    Process-wide view of the "ai data" worksheet partitioned by username.
+
+    The sheet is downloaded once; after that only rows appended below the
+    last one seen are fetched, so serving a user costs O(their rows).
+    """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.lock = threading.RLock()
+        self.header = CHAT_COLUMNS
+        self.rows_seen = 0          # sheet rows consumed, header included
+        self.by_user = {}           # user key -> {topic: [entry, ...]}
+        self.loaded = False
+        self.stale = False
+        self.refreshed_at = 0.0
+        self.generation = archive.generation("ai data")
+        self.version = 0  # shared-cache version of TOPIC reflected here
+
+    # ---------- ROW HANDLING ----------
+    def _add_row(self, values):
+        values = list(values) + [""] * (len(self.header) - len(values))
+        row = dict(zip(self.header, values))
+        key = user_key(row.get("username"))
+        if not key:
+            return
+        topic = sys.intern(str(row.get("topic") or "Untitled").strip())
+        self.by_user.setdefault(key, {}).setdefault(topic, []).append(make_entry(row))
+
+    def _load_all(self):
+        self.version = shared_cache.topic_version(TOPIC)
+        values = shared_cache.sheet_values(self.sheet, TOPIC)
+        self.by_user = {}
+        if values:
+            self.header = [str(h).strip() for h in values[0]] or CHAT_COLUMNS
+            for row in values[1:]:
+                self._add_row(row)
+        self.rows_seen = len(values)
+        self.loaded = True
+
+    def _load_tail(self):
+        start = max(self.rows_seen, 1) + 1
+        values = self.sheet.get_values(f"A{start}:E")
+        for row in values:
+            self._add_row(row)
+        self.rows_seen = start - 1 + len(values)
+
+    def refresh(self, force=False):
+        with self.lock:
+            version = shared_cache.topic_version(TOPIC)
+            if version != self.version:
+                self.stale = True  # another replica saved chats
+                self.version = version
+            due = time.time() - self.refreshed_at > REFRESH_INTERVAL
+            if (force or self.stale or due) and archive.generation("ai data") != self.generation:
+                # Old rows were archived, so sheet row numbers have shifted
+                self.generation = archive.generation("ai data")
+                self.loaded = False
+            if not self.loaded:
+                self._load_all()
+            elif force or self.stale or due:
+                self._load_tail()
+            else:
+                return
+            self.stale = False
+            self.refreshed_at = time.time()
+
+    # ---------- PUBLIC API ----------
+    def topic_counts(self, username):
+        """Return {topic: number of entries} for one user, oldest topic first."""
+        self.refresh()
+        with self.lock:
+            return {topic: len(entries) for topic, entries in self.by_user.get(user_key(username), {}).items()}
+
+    def entries(self, username, topic):
+        """Return a copy of one topic's entries (the entries themselves are shared)."""
+        self.refresh()
+        with self.lock:
+            return list(self.by_user.get(user_key(username), {}).get(topic, []))
+
+    def invalidate(self):
+        """Mark the cache stale so the next read fetches newly appended rows."""
+        with self.lock:
+            self.stale = True
+        shared_cache.notify(TOPIC)
+
+
+@st.cache_resource(max_entries=ARCHIVE_CACHE_USERS, show_spinner=False)
+def read_archived_chats(key, generation):
+    """One archive scan per user and archive generation; the result is shared, do not mutate it."""
+    chats = {}
+    for row in archive.iter_archived("ai data"):
+        if user_key(row.get("username")) == key:
+            topic = str(row.get("topic") or "Untitled").strip()
+            chats.setdefault(topic, []).append(make_entry(row))
+    return chats
+
+
+def load_archived_chats(username):
+    """{topic: [entries]} for one user from the "ai data" archive, oldest first."""
+    return read_archived_chats(user_key(username), archive.generation("ai data"))
+
+
+@st.cache_resource(show_spinner=False)
+def get_chat_cache(_sheet):
+    return ChatCache(_sheet)
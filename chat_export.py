@@ -0,0 +1,239 @@
+# chat_export.py
+"""
+Streaming export of one user's AI chat history as CSV, JSONL or Markdown.
+
+iter_export() is a generator: it reads the history one topic at a time and
+yields encoded chunks of about CHUNK_BYTES, so the whole file is never held
+in memory. Archived chats come first, then the current topics.
+
+st.download_button needs the finished file as bytes, so the in-app export
+(inline_export) is capped at INLINE_LIMIT bytes and refuses larger
+histories. To stream exports of any size, run the export server next to the
+app and set KISSAN_EXPORT_URL and KISSAN_EXPORT_SECRET (the same secret on
+both sides):
+
+    KISSAN_EXPORT_SECRET=... python chat_export.py --port 8503
+
+The app then links to a signed, short-lived URL and the server streams the
+generator straight into the response, so the download starts immediately.
+"""
+import argparse
+import csv
+import hashlib
+import hmac
+import io
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import archive
+from chat_cache import user_key
+
+# ------------------- SETTINGS -------------------
+CHUNK_BYTES = 64 * 1024
+INLINE_LIMIT = int(os.environ.get("KISSAN_EXPORT_INLINE_LIMIT", 5 * 1024 * 1024))  # bytes held for an in-app download
+LINK_TTL = 300  # seconds an export link stays valid
+
+# format -> (mime type, file extension)
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "md": ("text/markdown", "md"),
+}
+EXPORT_COLUMNS = ["topic", "timestamp", "question", "answer"]
+
+
+def setting(name, default=None):
+    value = os.environ.get(name)
+    if value is None:
+        try:
+            import streamlit as st
+            value = st.secrets.get(name, default)
+        except Exception:
+            value = default
+    return value
+
+
+# ------------------- SOURCES -------------------
+def iter_chats(username, topics, fetch, with_archive=True):
+    """(topic, entry) pairs: archived chats, then each topic in `topics` via fetch(topic)."""
+    if with_archive:
+        key = user_key(username)
+        for row in archive.iter_archived("ai data"):
+            if user_key(row.get("username")) == key:
+                yield str(row.get("topic") or "Untitled").strip(), row
+    for topic in topics:
+        for entry in fetch(topic):
+            yield topic, entry
+
+
+# ------------------- FORMATS -------------------
+def _csv_lines(chats):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for topic, entry in chats:
+        writer.writerow([topic, entry["timestamp"], entry["question"], entry["answer"]])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _jsonl_lines(chats):
+    for topic, entry in chats:
+        yield json.dumps({"topic": topic, "timestamp": entry["timestamp"],
+                          "question": entry["question"], "answer": entry["answer"]}, ensure_ascii=False) + "\n"
+
+
+def _markdown_lines(chats, username):
+    yield f"# Amazing Kissan chat history: {username}\n"
+    current = None
+    for topic, entry in chats:
+        if topic != current:
+            current = topic
+            yield f"\n## {topic}\n"
+        yield f"\n**🧑‍🌾 You** ({entry['timestamp']}):\n\n{entry['question']}\n\n**🤖 AI:**\n\n{entry['answer']}\n"
+
+
+def iter_export(username, fmt, topics, fetch, with_archive=True, chunk_bytes=CHUNK_BYTES):
+    """Yield the export file as UTF-8 chunks of roughly `chunk_bytes`."""
+    chats = iter_chats(username, topics, fetch, with_archive)
+    if fmt == "csv":
+        lines = _csv_lines(chats)
+    elif fmt == "jsonl":
+        lines = _jsonl_lines(chats)
+    elif fmt == "md":
+        lines = _markdown_lines(chats, username)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    pending, size = [], 0
+    for line in lines:
+        data = line.encode("utf-8")
+        pending.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            yield b"".join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b"".join(pending)
+
+
+class ExportTooLarge(Exception):
+    pass
+
+
+def inline_export(username, fmt, topics, fetch, limit=INLINE_LIMIT):
+    """
+    The export as bytes for st.download_button. Stops reading as soon as it
+    grows past `limit` bytes and raises ExportTooLarge, so memory stays bounded.
+    """
+    chunks, size = [], 0
+    for chunk in iter_export(username, fmt, topics, fetch, chunk_bytes=min(CHUNK_BYTES, limit)):
+        size += len(chunk)
+        if size > limit:
+            raise ExportTooLarge(f"export is larger than {limit} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def file_name(username, fmt):
+    return f"kissan-chats-{user_key(username) or 'user'}.{FORMATS[fmt][1]}"
+
+
+# ------------------- SIGNED LINKS -------------------
+def sign(username, fmt, expires, secret):
+    message = f"{user_key(username)}|{fmt}|{expires}".encode("utf-8")
+    return hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def export_url(username, fmt):
+    """Signed export server link, or None when no export server is configured."""
+    base, secret = setting("KISSAN_EXPORT_URL"), setting("KISSAN_EXPORT_SECRET")
+    if not base or not secret:
+        return None
+    expires = int(time.time()) + LINK_TTL
+    query = urlencode({"user": user_key(username), "format": fmt, "expires": expires,
+                       "sig": sign(username, fmt, expires, secret)})
+    return f"{base.rstrip('/')}/export?{query}"
+
+
+# ------------------- EXPORT SERVER -------------------
+class ExportHandler(BaseHTTPRequestHandler):
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _error(self, status, message):
+        body = message.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/export":
+            self._error(404, "Not found")
+            return
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        username, fmt = query.get("user", ""), query.get("format", "")
+        try:
+            expires = int(query.get("expires", 0))
+        except ValueError:
+            expires = 0
+        expected = sign(username, fmt, expires, self.server.secret)
+        if fmt not in FORMATS or expires < time.time() or not hmac.compare_digest(expected, query.get("sig", "")):
+            self._error(403, "This export link is invalid or has expired.")
+            return
+
+        from ai_assistant import fetch_history, load_user_chats
+
+        chats = load_user_chats(username)
+        self.send_response(200)
+        self.send_header("Content-Type", f"{FORMATS[fmt][0]}; charset=utf-8")
+        self.send_header("Content-Disposition", f'attachment; filename="{file_name(username, fmt)}"')
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            for chunk in iter_export(username, fmt, chats.topic_names(), lambda t: fetch_history(username, t)):
+                self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the browser cancelled the download
+
+
+class ExportServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, secret, verbose=False):
+        super().__init__(address, ExportHandler)
+        self.secret = secret
+        self.verbose = verbose
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream chat history exports for the app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8503)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    secret = setting("KISSAN_EXPORT_SECRET")
+    if not secret:
+        parser.error("KISSAN_EXPORT_SECRET is not set")
+    server = ExportServer((args.host, args.port), secret, args.verbose)
+    print(f"Chat export server listening on port {args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
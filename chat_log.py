@@ -0,0 +1,350 @@
+# chat_log.py
+"""
+Append-only local store for AI chats.
+
+Point KISSAN_CHAT_LOG at a directory to enable it: save_chat then appends
+chats there instead of to the "ai data" worksheet, and histories are read
+back from it. The directory holds
+
+    manifest.json        the current generation
+    g<gen>-<seq>.jsonl   data segments, one chat per line, rolled at SEGMENT_BYTES
+    g<gen>-index.jsonl   one [user, topic, segment, offset, length] line per chat
+
+Writers append under an exclusive file lock. Every process keeps a
+(user, topic) -> locations index in memory and catches up by reading only
+the index lines added since its last look, so reading a history seeks
+straight to its records instead of scanning the segments.
+
+    python chat_log.py --import      # copy the "ai data" worksheet into the log
+    python chat_log.py --compact     # rewrite the segments grouped by user and topic
+    python chat_log.py --stats
+
+KISSAN_CHAT_LOG_FSYNC picks when appends are forced to disk: "always",
+"interval" (default; at most once per KISSAN_CHAT_LOG_FSYNC_INTERVAL
+seconds, so a power loss can drop the last second of chats) or "never".
+Chats whose data was lost that way are skipped when reading.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+from chat_cache import CHAT_COLUMNS, ChatEntry, user_key
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized inside one process
+    fcntl = None
+
+# ------------------- SETTINGS -------------------
+LOG_DIR = os.environ.get("KISSAN_CHAT_LOG", "")
+SEGMENT_BYTES = 8 * 1024 * 1024  # segment size before rolling to the next file
+FSYNC_POLICY = os.environ.get("KISSAN_CHAT_LOG_FSYNC", "interval")
+FSYNC_INTERVAL = float(os.environ.get("KISSAN_CHAT_LOG_FSYNC_INTERVAL", "1"))
+
+
+def enabled():
+    return LOG_DIR not in ("", "off")
+
+
+# ------------------- CHAT LOG -------------------
+class ChatLog:
+    """Segmented JSONL chat log with a per user/topic offset index."""
+
+    def __init__(self, path, fsync=FSYNC_POLICY, segment_bytes=SEGMENT_BYTES):
+        self.path = path
+        self.fsync = fsync
+        self.segment_bytes = segment_bytes
+        self.lock = threading.RLock()
+        self.last_sync = 0.0
+        os.makedirs(path, exist_ok=True)
+        self._reset(self._manifest_generation())
+
+    def _reset(self, generation):
+        self.generation = generation
+        self.index = {}       # user key -> {topic: [(segment, offset, length), ...]}
+        self.index_pos = 0    # bytes of the index file consumed
+        self.segment = 0      # newest segment number seen
+
+    # ---------- FILES ----------
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _segment_path(self, segment, generation=None):
+        generation = self.generation if generation is None else generation
+        return self._file(f"g{generation}-{segment:06d}.jsonl")
+
+    def _index_path(self, generation=None):
+        generation = self.generation if generation is None else generation
+        return self._file(f"g{generation}-index.jsonl")
+
+    def _manifest_generation(self):
+        try:
+            with open(self._file("manifest.json"), encoding="utf-8") as f:
+                return json.load(f).get("generation", 0)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+
+    def _save_manifest(self, generation):
+        tmp = self._file("manifest.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"generation": generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._file("manifest.json"))
+
+    @contextmanager
+    def _exclusive(self):
+        """Serialize writers across threads and processes."""
+        with self.lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._file("lock"), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _sync_due(self):
+        return self.fsync == "always" or (self.fsync == "interval" and time.time() - self.last_sync >= FSYNC_INTERVAL)
+
+    @staticmethod
+    def _flush(f, sync):
+        f.flush()
+        if sync:
+            os.fsync(f.fileno())
+
+    # ---------- INDEX ----------
+    def _catch_up(self):
+        """Fold in index lines appended (by any process) since the last call."""
+        generation = self._manifest_generation()
+        if generation != self.generation:
+            self._reset(generation)  # compacted by another process
+        try:
+            with open(self._index_path(), "rb") as f:
+                f.seek(self.index_pos)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # an append still in progress
+                    self.index_pos += len(line)
+                    try:
+                        user, topic, segment, offset, length = json.loads(line)
+                    except ValueError:
+                        continue  # torn by a crash before the index reached the disk
+                    topics = self.index.setdefault(user, {})
+                    topics.setdefault(sys.intern(topic), []).append((segment, offset, length))
+                    self.segment = max(self.segment, segment)
+        except FileNotFoundError:
+            pass
+
+    # ---------- WRITES ----------
+    def append_many(self, chats):
+        """Append (username, topic, timestamp, question, answer) tuples. Returns chats written."""
+        chats = list(chats)
+        if not chats:
+            return 0
+        with self._exclusive():
+            self._catch_up()
+            sync = self._sync_due()
+            data = open(self._segment_path(self.segment), "ab")
+            index = open(self._index_path(), "ab")
+            try:
+                entries = []
+                for username, topic, timestamp, question, answer in chats:
+                    record = json.dumps({"u": user_key(username), "t": topic, "ts": timestamp,
+                                         "q": question, "a": answer}, ensure_ascii=False)
+                    record = (record + "\n").encode("utf-8")
+                    offset = os.fstat(data.fileno()).st_size
+                    if offset >= self.segment_bytes:
+                        self._flush(data, sync)
+                        data.close()
+                        self.segment += 1
+                        data = open(self._segment_path(self.segment), "ab")
+                        offset = os.fstat(data.fileno()).st_size
+                    data.write(record)
+                    data.flush()
+                    entry = [user_key(username), topic, self.segment, offset, len(record)]
+                    entries.append((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+                # A synced append forces the data to disk before writing the index lines that point
+                # at it. Otherwise the OS may persist them out of order, so readers skip records
+                # that did not survive a crash.
+                self._flush(data, sync)
+                index.write(b"".join(entries))
+                self._flush(index, sync)
+                if sync:
+                    self.last_sync = time.time()
+            finally:
+                data.close()
+                index.close()
+            self._catch_up()
+        return len(chats)
+
+    def append(self, username, topic, timestamp, question, answer):
+        return self.append_many([(username, topic, timestamp, question, answer)])
+
+    # ---------- READS ----------
+    def _read_records(self, generation, locations):
+        """Raw record bytes at `locations`, reading adjacent records in one go."""
+        runs = []
+        for segment, offset, length in locations:
+            if runs and runs[-1][0] == segment and runs[-1][1] + runs[-1][2] == offset:
+                runs[-1][2] += length
+            else:
+                runs.append([segment, offset, length])
+        handles = {}
+        try:
+            for segment, offset, length in runs:
+                if segment not in handles:
+                    handles[segment] = open(self._segment_path(segment, generation), "rb")
+                f = handles[segment]
+                f.seek(offset)
+                chunk = f.read(length)
+                records = chunk.split(b"\n")
+                if len(chunk) < length:
+                    records.pop()  # cut off: the data never reached the disk
+                for record in records:
+                    if record:
+                        yield record
+        finally:
+            for f in handles.values():
+                f.close()
+
+    def topic_counts(self, username):
+        """{topic: number of chats} for one user, oldest topic first."""
+        with self.lock:
+            self._catch_up()
+            return {topic: len(locations) for topic, locations in self.index.get(user_key(username), {}).items()}
+
+    def entries(self, username, topic):
+        """One topic's chats as ChatEntry records, oldest first."""
+        for attempt in range(2):
+            with self.lock:
+                self._catch_up()
+                locations = list(self.index.get(user_key(username), {}).get(topic, []))
+                generation = self.generation
+            try:
+                entries = (self._entry(record) for record in self._read_records(generation, locations))
+                return [entry for entry in entries if entry is not None]
+            except FileNotFoundError:
+                if attempt:
+                    raise  # compacted while reading: the next pass sees the new generation
+
+    @staticmethod
+    def _entry(record):
+        """The record as a ChatEntry, or None if a crash left it unreadable."""
+        try:
+            chat = json.loads(record)
+        except ValueError:
+            return None
+        return ChatEntry(chat.get("ts"), chat.get("q"), chat.get("a"))
+
+    # ---------- MAINTENANCE ----------
+    def compact(self):
+        """
+        Rewrite every indexed chat into a new generation, grouped by user and
+        topic so a history is one contiguous read. Unindexed records (left by
+        an append that crashed before its index line) and unreadable ones are
+        dropped.
+        Returns the number of chats kept.
+        """
+        with self._exclusive():
+            self._catch_up()
+            old, new = self.generation, self.generation + 1
+            segment, kept = 0, 0
+            data = open(self._segment_path(segment, new), "wb")
+            index = open(self._index_path(new), "wb")
+            try:
+                for user, topics in self.index.items():
+                    for topic, locations in topics.items():
+                        for record in self._read_records(old, locations):
+                            if self._entry(record) is None:
+                                continue
+                            record += b"\n"
+                            if data.tell() >= self.segment_bytes:
+                                data.flush()
+                                os.fsync(data.fileno())
+                                data.close()
+                                segment += 1
+                                data = open(self._segment_path(segment, new), "wb")
+                            entry = [user, topic, segment, data.tell(), len(record)]
+                            data.write(record)
+                            index.write((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+                            kept += 1
+                for f in (data, index):
+                    f.flush()
+                    os.fsync(f.fileno())
+            finally:
+                data.close()
+                index.close()
+            self._save_manifest(new)
+            for name in os.listdir(self.path):
+                if name.startswith(f"g{old}-"):
+                    os.remove(self._file(name))
+            self._reset(new)
+            self._catch_up()
+        return kept
+
+    def stats(self):
+        with self.lock:
+            self._catch_up()
+            segments = [n for n in os.listdir(self.path) if n.startswith(f"g{self.generation}-") and "index" not in n]
+            return {
+                "generation": self.generation,
+                "segments": len(segments),
+                "bytes": sum(os.path.getsize(self._file(n)) for n in segments),
+                "users": len(self.index),
+                "topics": sum(len(topics) for topics in self.index.values()),
+                "chats": sum(len(locations) for topics in self.index.values() for locations in topics.values()),
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_chat_log():
+    return ChatLog(LOG_DIR)
+
+
+# ------------------- CLI -------------------
+def import_sheet(log):
+    """Append every row of the "ai data" worksheet to the log. Returns rows imported."""
+    import archive
+
+    ws = archive.connect_worksheet("ai data")
+    if ws is None:
+        raise RuntimeError("ai data worksheet unavailable")
+    values = ws.get_all_values()
+    header = [str(h).strip() for h in values[0]] if values else CHAT_COLUMNS
+    rows = [dict(zip(header, row)) for row in values[1:]]
+    return log.append_many(
+        (row.get("username", ""), str(row.get("topic") or "Untitled").strip(),
+         row.get("timestamp", ""), row.get("question", ""), row.get("answer", ""))
+        for row in rows if user_key(row.get("username"))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the local AI chat log")
+    parser.add_argument("--dir", default=LOG_DIR or "chatlog", help="log directory (default: KISSAN_CHAT_LOG)")
+    parser.add_argument("--import", dest="import_sheet", action="store_true",
+                        help='append the "ai data" worksheet to the log')
+    parser.add_argument("--compact", action="store_true", help="rewrite segments grouped by user and topic")
+    parser.add_argument("--stats", action="store_true")
+    args = parser.parse_args()
+
+    log = ChatLog(args.dir)
+    if args.import_sheet:
+        print(f"Imported {import_sheet(log)} chats")
+    if args.compact:
+        print(f"Compacted: {log.compact()} chats kept")
+    if args.stats or not (args.import_sheet or args.compact):
+        print(json.dumps(log.stats(), indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# chat_session.py
+"""
+Per-session chat state kept small.
+
+A session only holds its user's topic index ({topic: entry count}) and an
+LRU window of the conversations it opened recently. Full histories stay in
+the process-wide ChatCache (entries are shared ChatEntry objects, not
+copies) and are fetched again when an evicted topic is reopened.
+"""
+from collections import OrderedDict
+
+# ------------------- SETTINGS -------------------
+WINDOW_TOPICS = 3  # conversations a session keeps loaded
+
+
+class ChatSession:
+    """Topic index plus an LRU window of loaded conversations for one user."""
+
+    __slots__ = ("username", "topics", "window", "loader", "with_archive")
+
+    def __init__(self, username, topic_counts, loader=None):
+        self.username = username
+        self.topics = dict(topic_counts)   # topic -> entries, oldest topic first
+        self.window = OrderedDict()        # topic -> [ChatEntry], most recent last
+        self.loader = loader               # loader(username, topic, with_archive) -> [ChatEntry]
+        self.with_archive = False
+
+    # ---------- TOPICS ----------
+    def topic_names(self):
+        return list(self.topics)
+
+    def __bool__(self):
+        return bool(self.topics)
+
+    # ---------- HISTORY ----------
+    def _fetch(self, topic):
+        if self.loader is None or topic not in self.topics:
+            return []
+        return self.loader(self.username, topic, self.with_archive)
+
+    def _evict(self):
+        # Without a shared store an evicted conversation could not be reloaded
+        while self.loader is not None and len(self.window) > WINDOW_TOPICS:
+            self.window.popitem(last=False)
+
+    def history(self, topic):
+        """The conversation for `topic`, loading it into the window if needed."""
+        if topic in self.window:
+            self.window.move_to_end(topic)
+        else:
+            self.window[topic] = self._fetch(topic)
+            self._evict()
+        return self.window[topic]
+
+    def start_topic(self, topic):
+        """Register a new (or reused) topic and make it the most recent one."""
+        self.topics.setdefault(topic, 0)
+        return self.history(topic)
+
+    def append(self, topic, entry):
+        self.history(topic).append(entry)
+        self.topics[topic] = self.topics.get(topic, 0) + 1
+
+    def find(self, query):
+        """First topic whose name or questions contain `query`, without touching the window."""
+        query = query.lower().strip()
+        for topic in self.topics:
+            if query in topic.lower():
+                return topic
+        for topic in self.topics:
+            entries = self.window.get(topic) or self._fetch(topic)
+            if any(query in entry["question"].lower() for entry in entries):
+                return topic
+        return None
+
+    # ---------- ARCHIVE ----------
+    def include_archive(self, archived_counts):
+        """Merge archived topics into the index; loaded conversations are refetched."""
+        archived = dict(archived_counts)
+        merged = {topic: count for topic, count in archived.items() if topic not in self.topics}
+        for topic, count in self.topics.items():
+            merged[topic] = count + archived.get(topic, 0)
+        self.topics = merged
+        self.with_archive = True
+        if self.loader is not None:
+            self.window.clear()
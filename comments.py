@@ -1,6 +1,11 @@
 import gspread
 import json
+import threading
 import streamlit as st
+import archive
+import shared_cache
+from mirror import mirrored
+from collections import OrderedDict
 from datetime import datetime
 from oauth2client.service_account import ServiceAccountCredentials
 
@@ -9,6 +14,74 @@ SCOPE = [
     "https://spreadsheets.google.com/feeds",
     "https://www.googleapis.com/auth/drive"
 ]
+COMMENT_COLUMNS = ["msg_id", "user", "text", "time"]
+COMMENTS_TTL = 30  # seconds a comments snapshot is reused across reruns
+THREAD_CACHE_SIZE = 256  # comment threads kept ready for reopening
+TOPIC = "Sheet4"  # shared-cache topic announced on every new comment
+COUNT_CACHE_SIZE = 10000  # messages whose comment counts are remembered
+
+
+# ---------- COMMENT COUNTS ----------
+class CommentCounts:
+    """
+    Comment counts seen in the last snapshot, shown without doing any I/O.
+    Shared by every session in the process, so all access holds the lock;
+    the least recently updated counts are dropped beyond `max_entries`.
+    """
+
+    def __init__(self, max_entries=COUNT_CACHE_SIZE):
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.counts = OrderedDict()  # msg_id -> count, least recently updated first
+        self.through_row = 1  # newest comment row already reflected in counts
+        self.generation = archive.generation("Sheet4")
+
+    def _set(self, msg_id, count):
+        self.counts[msg_id] = count
+        self.counts.move_to_end(msg_id)
+        if len(self.counts) > self.max_entries:
+            self.counts.popitem(last=False)
+
+    def get(self, msg_id):
+        with self.lock:
+            return self.counts.get(msg_id)
+
+    def update(self, index):
+        """Take the counts of a full {msg_id: [comments]} snapshot."""
+        with self.lock:
+            for msg_id, rows in index.items():
+                self._set(msg_id, len(rows))
+            self.through_row = max(self.through_row, 1 + sum(len(rows) for rows in index.values()))
+
+    def apply(self, new_comments):
+        """Count comments not applied yet; returns the msg_ids they touched."""
+        touched = []
+        with self.lock:
+            for comment in new_comments:
+                if comment["_row"] <= self.through_row:
+                    continue  # another session already applied it
+                self.through_row = comment["_row"]
+                msg_id = str(comment.get("msg_id"))
+                if msg_id in self.counts:
+                    self._set(msg_id, self.counts[msg_id] + 1)
+                touched.append(msg_id)
+        return touched
+
+    def sync(self, generation):
+        """Forget everything row-based if the archive generation moved. Returns True if it did."""
+        with self.lock:
+            if generation == self.generation:
+                return False
+            self.generation = generation
+            self.counts.clear()
+            self.through_row = 1
+            return True
+
+
+@st.cache_resource(show_spinner=False)
+def get_comment_counts():
+    return CommentCounts()
+
 
 # ---------- CONNECT ----------
 @st.cache_resource(show_spinner=False)
@@ -19,7 +92,7 @@ def connect_comment_sheet():
         creds_dict = json.loads(creds_json)
         creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
         client = gspread.authorize(creds)
-        return client.open("User").worksheet("Sheet4")
+        return mirrored(client.open("User").worksheet("Sheet4"))
     except Exception as e:
         st.warning(f"⚠️ Could not connect to Comment Sheet: {e}")
         return None
@@ -40,19 +113,104 @@ def add_comment_gsheet(msg_id, username, text):
             datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         ]
         sheet.append_row(new_row)
+        shared_cache.notify(TOPIC)
+        read_comments_index.clear()
+        load_comment_thread.clear()
     except Exception as e:
         st.error(f"❌ Could not add comment: {e}")
 
 
 # ---------- LOAD COMMENTS ----------
+@st.cache_data(ttl=COMMENTS_TTL, show_spinner=False)
+def read_comments_index(version=0):
+    """Read Sheet4 once and group its rows by msg_id."""
+    sheet = connect_comment_sheet()
+    if not sheet:
+        return {}
+    index = {}
+    for row in shared_cache.sheet_records(sheet, TOPIC):
+        index.setdefault(str(row.get("msg_id")), []).append(row)
+    return index
+
+
+def load_comments_index():
+    """Return {msg_id: [comments]} from the current comments snapshot."""
+    try:
+        index = read_comments_index(shared_cache.topic_version(TOPIC))
+    except Exception as e:
+        st.warning(f"⚠️ Could not load comments: {e}")
+        return {}
+    get_comment_counts().update(index)
+    return index
+
+
+def comment_count(index, msg_id):
+    return len(index.get(str(msg_id), []))
+
+
+def cached_comment_count(msg_id):
+    """Comment count from the last snapshot, or None if not known yet."""
+    return get_comment_counts().get(str(msg_id))
+
+
+@st.cache_data(ttl=COMMENTS_TTL, max_entries=THREAD_CACHE_SIZE, show_spinner=False)
+def load_comment_thread(msg_id):
+    """Load one message's comments; only called when its thread is opened."""
+    return load_comments_index().get(str(msg_id), [])
+
+
 def load_comments_gsheet(msg_id):
     """Load comments related to a specific message ID."""
+    return load_comments_index().get(str(msg_id), [])
+
+
+# ---------- INCREMENTAL UPDATES ----------
+@st.cache_data(ttl=COMMENTS_TTL, show_spinner=False)
+def read_comment_row_count():
+    """Sheet row of the newest comment (1 = header only)."""
+    sheet = connect_comment_sheet()
+    if not sheet:
+        return 1
+    return max(len(sheet.col_values(1)), 1)
+
+
+def load_new_comments(since_row):
+    """Comments appended below `since_row`, as dicts with their sheet row."""
+    sheet = connect_comment_sheet()
+    if not sheet:
+        return []
+    new_comments = []
+    for offset, values in enumerate(sheet.get_values(f"A{since_row + 1}:D")):
+        values = list(values) + [""] * (len(COMMENT_COLUMNS) - len(values))
+        comment = dict(zip(COMMENT_COLUMNS, values))
+        comment["_row"] = since_row + 1 + offset
+        new_comments.append(comment)
+    return new_comments
+
+
+def apply_new_comments(new_comments):
+    """Update known counts and drop cached threads touched by new comments."""
+    touched = get_comment_counts().apply(new_comments)
+    if touched:
+        read_comments_index.clear()
+    for msg_id in touched:
+        load_comment_thread.clear(msg_id)
+
+
+def sync_archive_generation():
+    """Forget row-based bookkeeping after old comments were archived."""
+    if get_comment_counts().sync(archive.generation("Sheet4")):
+        read_comments_index.clear()
+        read_comment_row_count.clear()
+        load_comment_thread.clear()
+
+
+# ---------- ARCHIVED COMMENTS ----------
+@st.cache_data(max_entries=THREAD_CACHE_SIZE, show_spinner=False)
+def load_archived_thread(msg_id, generation):
+    """Archived comments of an archived message (scans the comment archive)."""
     try:
-        sheet = connect_comment_sheet()
-        if not sheet:
-            return []
-        data = sheet.get_all_records()
-        return [row for row in data if str(row.get("msg_id")) == str(msg_id)]
+        return [row for row in archive.iter_archived("Sheet4") if str(row.get("msg_id")) == str(msg_id)]
     except Exception as e:
-        st.warning(f"⚠️ Could not load comments: {e}")
-        return []
\ No newline at end of file
+        st.warning(f"⚠️ Could not load archived comments: {e}")
+        return []
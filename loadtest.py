@@ -0,0 +1,280 @@
+# loadtest.py
+"""
+Multi-session load test of the whole app against local stand-in backends.
+
+    python loadtest.py --users 40 --replicas 4
+    python loadtest.py --users 10 --journey login,market --rounds 3 --sheets-latency 0.3
+
+Every simulated farmer drives main.py through AppTest reruns: open the
+app, log in, ask the AI assistant, post and like a message, then browse
+the market and buy a lot. Google Sheets is replaced by a shared in-memory
+workbook (mock_sheets.py), and Groq is replaced by mock_llm.py.
+
+AppTest can only run one rerun at a time per process. Each "replica"
+process therefore hosts several sessions and interleaves their reruns, and
+they share that process's caches the way sessions in one Streamlit server
+do. Replicas run in parallel.
+
+The report shows:
+- throughput;
+- p50/p95/p99 latency per step;
+- memory per session;
+- backend calls per worksheet method.
+"""
+import argparse
+import heapq
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+import mock_llm
+import mock_sheets
+from loadtest_ai import QUESTIONS, Results
+from storage import deep_size
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+JOURNEY_STEPS = ["login", "ai", "message", "market"]
+PASSWORD = "loadtest-password"
+CROPS = ["Paddy", "Wheat", "Maize", "Millet", "Cotton", "Groundnut"]
+TOWNS = ["Madurai", "Salem", "Erode", "Trichy", "Vellore", "Karur"]
+
+
+# ------------------- SEED DATA -------------------
+def seed_workbook(args):
+    from login import hash_password
+
+    sheets = mock_sheets.empty_workbook()
+    for n in range(args.users):
+        sheets["Sheet1"].append_row([f"farmer{n}", hash_password(PASSWORD), f"Farmer {n}", f"farmer{n}@example.com",
+                                     f"+9190000{n:05d}", TOWNS[n % len(TOWNS)], "1990-01-01"])
+    rng = random.Random(0)
+    sheets["Sheet5"].append_rows([
+        [f"farmer{i % max(args.users, 1)}", CROPS[i % len(CROPS)], rng.randint(50, 2000), rng.randint(15, 60),
+         TOWNS[i % len(TOWNS)], "+919000000000", "seller@example.com", f"seed{i:06d}", 0, "2024-01-01 08:00:00"]
+        for i in range(args.listings)])
+    sheets["Sheet3"].append_rows([
+        [f"seed{i}", f"farmer{i % max(args.users, 1)}", f"Seed message {i}", 0, "2024-01-01 08:00:00"]
+        for i in range(args.messages)])
+    sheets["Sheet4"].append_rows([
+        [f"seed{i % max(args.messages, 1)}", "farmer0", f"Seed comment {i}", "2024-01-01 09:00:00"]
+        for i in range(args.messages // 2)])
+    return sheets
+
+
+# ------------------- MEASUREMENT -------------------
+def rss_kb():
+    """Current resident set size in KB (peak size where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# ------------------- JOURNEY -------------------
+def find_button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def journey(at, user_no, args, results):
+    """One farmer's scripted session; yields after every step so sessions interleave."""
+    rng = random.Random(user_no)
+
+    def step(name, action=None):
+        if action:
+            action()
+        start = time.perf_counter()
+        try:
+            at.run()
+            ok = not at.exception and not at.error  # pages report caught failures with st.error
+        except Exception:
+            ok = False
+        results.record(name, time.perf_counter() - start, ok)
+
+    step("open")
+    yield
+    for _ in range(args.rounds):
+        for name in args.journey:
+            if name == "login" and not at.session_state["logged_in"]:
+                step("nav.login", lambda: at.sidebar.button(key="nav_Login").click())
+                yield
+                at.text_input(key="login_user").set_value(f"farmer{user_no}")
+                at.text_input(key="login_pass").set_value(PASSWORD)
+                step("login", lambda: find_button(at, "Login").click())
+                yield
+
+            elif name == "ai":
+                step("nav.ai", lambda: at.button(key="ai_new").click())
+                yield
+                if at.chat_input:
+                    step("ai.ask", lambda: at.chat_input[0].set_value(rng.choice(QUESTIONS)))
+                    yield
+
+            elif name == "message":
+                step("nav.message", lambda: at.sidebar.button(key="nav_Message").click())
+                yield
+                step("message.compose", lambda: at.button(key="fab").click())
+                yield
+                if any(t.key == "msg_input" for t in at.text_area):
+                    at.text_area(key="msg_input").set_value(f"Load test post from farmer{user_no}")
+                    step("message.post", lambda: find_button(at, "📨 Send").click())
+                    yield
+                likes = [b for b in at.button if b.key and b.key.startswith("like_") and not b.disabled]
+                if likes:
+                    step("message.like", rng.choice(likes).click)
+                    yield
+
+            elif name == "market":
+                step("nav.market", lambda: at.sidebar.button(key="nav_Market").click())
+                yield
+                step("market.filter", lambda: at.selectbox(key="mkt_crop").set_value(rng.choice(CROPS)))
+                yield
+                if at.session_state["logged_in"]:
+                    buy(user_no, rng, args, results)
+                    step("market.after_buy")
+                    yield
+
+
+def buy(user_no, rng, args, results):
+    """
+    Place an order through orders.place_order, the call behind the Buy button.
+    AppTest cannot select st.dataframe rows, so the listing is picked here.
+    """
+    from market_index import get_listing_index
+    from orders import place_order
+
+    book = mock_sheets.MockClient(args.sheets_url).open("User")
+    market_sheet, orders_sheet = book.worksheet("Sheet5"), book.worksheet("Sheet6")
+    index = get_listing_index(market_sheet)
+    positions = index.query(min_quantity=1)
+    if not len(positions):
+        return
+    listing = index.rows([rng.choice(positions[:200])])[0]
+    start = time.perf_counter()
+    try:
+        ok = place_order(market_sheet, orders_sheet, listing, 1, f"farmer{user_no}",
+                         f"farmer{user_no}@example.com", "Pickup")[0]
+    except Exception:
+        ok = False
+    results.record("market.buy", time.perf_counter() - start, ok)
+
+
+def replica(replica_no, user_numbers, args):
+    """One process hosting several sessions; reruns are interleaved with think time."""
+    from streamlit.testing.v1 import AppTest
+
+    mock_sheets.install(args.sheets_url)
+    results = Results()
+    base_rss = rss_kb()
+    sessions, ready = [], []
+    for user_no in user_numbers:
+        at = AppTest.from_file(MAIN_SCRIPT, default_timeout=args.timeout)
+        at.secrets["google"] = {"secrets_creds": "{}"}
+        sessions.append(at)
+        heapq.heappush(ready, (time.perf_counter(), user_no, journey(at, user_no, args, results)))
+
+    start = time.perf_counter()
+    rng = random.Random(replica_no)
+    while ready:
+        ready_at, user_no, steps = heapq.heappop(ready)
+        time.sleep(max(0.0, ready_at - time.perf_counter()))
+        try:
+            next(steps)
+        except StopIteration:
+            continue
+        heapq.heappush(ready, (time.perf_counter() + rng.uniform(0, args.think), user_no, steps))
+    elapsed = time.perf_counter() - start
+
+    state_sizes = []
+    for at in sessions:
+        state_sizes.append(deep_size(at.session_state.filtered_state))
+    return {
+        "latencies": results.latencies,
+        "errors": results.errors,
+        "elapsed": elapsed,
+        "sessions": len(sessions),
+        "rss_growth_kb": rss_kb() - base_rss,
+        "state_bytes": state_sizes,
+        "counters": metrics.snapshot()["counters"],
+    }
+
+
+# ------------------- RUNNER -------------------
+def main():
+    parser = argparse.ArgumentParser(description="Load test the whole app with simulated farmers")
+    parser.add_argument("--users", type=int, default=20, help="simulated sessions")
+    parser.add_argument("--replicas", type=int, default=4, help="processes the sessions are spread over")
+    parser.add_argument("--journey", default=",".join(JOURNEY_STEPS),
+                        help=f"comma separated steps out of {','.join(JOURNEY_STEPS)}")
+    parser.add_argument("--rounds", type=int, default=1, help="times each session repeats its journey")
+    parser.add_argument("--think", type=float, default=0.5, help="max think time between steps (s)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-rerun timeout (s)")
+    parser.add_argument("--listings", type=int, default=2000, help="seeded market listings")
+    parser.add_argument("--messages", type=int, default=500, help="seeded messages")
+    parser.add_argument("--sheets-latency", type=float, default=0.0, help="added latency per Sheets call (s)")
+    parser.add_argument("--model", action="append", default=[], help="mock model spec, see mock_llm.py")
+    args = parser.parse_args()
+    args.journey = [s.strip() for s in args.journey.split(",") if s.strip() in JOURNEY_STEPS]
+    args.replicas = max(1, min(args.replicas, args.users))
+
+    models = {name: dict(mock_llm.DEFAULT_BEHAVIOUR) for name in mock_llm.DEFAULT_MODELS}
+    models.update(dict(mock_llm.parse_model_spec(spec) for spec in args.model))
+    llm = mock_llm.start_server(models)
+    sheets = mock_sheets.start_server(seed_workbook(args), latency=args.sheets_latency)
+    args.sheets_url = sheets.url
+
+    # Replicas are spawned fresh, so they read this environment on import
+    scratch = tempfile.mkdtemp(prefix="kissan-loadtest-")
+    os.environ.update({
+        "GROQ_API_URL": llm.url,
+        "GROQ_API_KEY": "loadtest",
+        "KISSAN_SHARED_CACHE": os.path.join(scratch, "shared_cache.sqlite3"),
+        "KISSAN_MIRROR": os.path.join(scratch, "no-mirror.sqlite3"),
+        "KISSAN_ARCHIVE_DIR": os.path.join(scratch, "archive"),
+    })
+    os.environ.pop("KISSAN_PROFILE", None)
+
+    groups = [list(range(args.users))[r::args.replicas] for r in range(args.replicas)]
+    results = Results()
+    replicas = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.replicas, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for future in [pool.submit(replica, r, group, args) for r, group in enumerate(groups)]:
+            outcome = future.result()
+            results.merge(outcome["latencies"], outcome["errors"])
+            replicas.append(outcome)
+    elapsed = time.perf_counter() - start
+
+    reruns = sum(len(v) for k, v in results.latencies.items() if k != "market.buy")
+    print(f"Sessions: {args.users} over {args.replicas} replica(s), journey {','.join(args.journey)} "
+          f"x{args.rounds}, think <= {args.think}s, Sheets latency {args.sheets_latency}s")
+    print(f"Throughput: {reruns / elapsed:.1f} reruns/s, {args.users * args.rounds / elapsed:.2f} journeys/s")
+    print(results.report(elapsed))
+
+    state = [size for r in replicas for size in r["state_bytes"]]
+    per_session = [r["rss_growth_kb"] / max(r["sessions"], 1) for r in replicas]
+    print(f"Memory: session_state avg {sum(state) / max(len(state), 1) / 1024:.1f}KB "
+          f"max {max(state, default=0) / 1024:.1f}KB; "
+          f"RSS growth per session avg {sum(per_session) / len(per_session) / 1024:.1f}MB "
+          f"(includes each replica's shared caches)")
+
+    calls = mock_sheets.stats(sheets.url)
+    total = sum(calls.values())
+    print(f"Sheets calls: {total} total, {total / max(args.users, 1):.1f} per session")
+    for key, count in sorted(calls.items(), key=lambda item: -item[1]):
+        print(f"  {key:<28} {count}")
+    print(f"LLM calls: {llm.stats}")
+    coalesced = sum(r["counters"].get("ai.ask.coalesced", 0) for r in replicas)
+    shared_hits = sum(r["counters"].get("shared_cache.hits", 0) for r in replicas)
+    print(f"AI requests coalesced: {coalesced}; shared cache hits: {shared_hits}")
+    llm.shutdown()
+    sheets.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# loadtest_ai.py
+"""
+Load test for the AI Assistant path against a local or remote mock LLM.
+
+    python loadtest_ai.py --users 50 --questions 3                  # ask_ai + generate_topic
+    python loadtest_ai.py --mode app --users 20 --questions 2       # full ai_assistant.app reruns
+    python loadtest_ai.py --url http://127.0.0.1:8765/v1/chat/completions
+
+Without --url an embedded mock_llm server is started. --distinct controls how
+many different questions the simulated farmers draw from, so a small value
+models a viral question and exercises request coalescing.
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import metrics
+import mock_llm
+
+QUESTIONS = [
+    "How much water does paddy need in the tillering stage?",
+    "What is the best fertilizer schedule for wheat?",
+    "How do I control stem borer in maize?",
+    "When should I harvest groundnut?",
+    "Which millet variety suits dry red soil?",
+    "How can I prevent leaf curl in chilli?",
+    "What spacing should I use for sugarcane setts?",
+    "Is drip irrigation worth it for cotton?",
+]
+
+
+# ------------------- RESULTS -------------------
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, name, seconds, ok=True):
+        with self.lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def merge(self, latencies, errors):
+        with self.lock:
+            for name, values in latencies.items():
+                self.latencies.setdefault(name, []).extend(values)
+            for name, count in errors.items():
+                self.errors[name] = self.errors.get(name, 0) + count
+
+    def report(self, elapsed):
+        lines = [f"Elapsed: {elapsed:.2f}s"]
+        for name, values in sorted(self.latencies.items()):
+            lines.append(
+                f"{name:<16} n={len(values):<6} errors={self.errors.get(name, 0):<5} "
+                f"rps={len(values) / elapsed:8.2f}  "
+                f"p50={metrics.percentile(values, 50) * 1000:8.1f}ms  "
+                f"p95={metrics.percentile(values, 95) * 1000:8.1f}ms  "
+                f"p99={metrics.percentile(values, 99) * 1000:8.1f}ms"
+            )
+        return "\n".join(lines)
+
+
+def timed(results, name, fn, is_ok=lambda result: True):
+    start = time.perf_counter()
+    try:
+        result = fn()
+    except Exception:
+        results.record(name, time.perf_counter() - start, ok=False)
+        return None
+    results.record(name, time.perf_counter() - start, ok=is_ok(result))
+    return result
+
+
+# ------------------- JOURNEYS -------------------
+def direct_user(user_no, args, results):
+    """One simulated farmer calling ask_ai / generate_topic directly."""
+    import ai_assistant
+
+    rng = random.Random(user_no)
+    history, topics = [], []
+    for _ in range(args.questions):
+        question = rng.choice(QUESTIONS[:args.distinct])
+        reply = timed(results, "ask_ai", lambda: ai_assistant.ask_ai(question, history),
+                      lambda r: not r[0].startswith("❌"))
+        answer = reply[0] if reply else ""
+        if not history:
+            topic = timed(results, "generate_topic",
+                          lambda: ai_assistant.generate_topic(question, answer, topics))
+            topics.append(topic or "New Chat")
+        history.append({"question": question, "answer": answer})
+        time.sleep(rng.uniform(0, args.think))
+
+
+def _ai_page():
+    import ai_assistant
+    ai_assistant.app()
+
+
+def app_user(user_no, args):
+    """
+    One simulated farmer driving ai_assistant.app through reruns.
+
+    AppTest swaps a process-global runtime in and out on every run, so each
+    simulated session runs in its own process.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    results = Results()
+    rng = random.Random(user_no)
+    at = AppTest.from_function(_ai_page, default_timeout=args.timeout)
+    at.session_state["logged_in"] = True
+    at.session_state["user"] = {"username": f"loadtest_{user_no}"}
+    at.session_state["user_chats"] = None
+    timed(results, "app.open", at.run, lambda r: not at.exception)
+    for _ in range(args.questions):
+        question = rng.choice(QUESTIONS[:args.distinct])
+        at.chat_input[0].set_value(question)
+        timed(results, "app.ask", at.run, lambda r: not at.exception)
+        time.sleep(rng.uniform(0, args.think))
+    return results.latencies, results.errors
+
+
+# ------------------- RUNNER -------------------
+def main():
+    parser = argparse.ArgumentParser(description="Load test the AI Assistant path")
+    parser.add_argument("--mode", choices=["direct", "app"], default="direct")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=3, help="questions per user")
+    parser.add_argument("--distinct", type=int, default=len(QUESTIONS), help="size of the question pool")
+    parser.add_argument("--think", type=float, default=0.0, help="max think time between questions (s)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-rerun timeout in app mode (s)")
+    parser.add_argument("--url", help="chat completions URL; default starts an embedded mock")
+    parser.add_argument("--model", action="append", default=[], help="mock model spec, see mock_llm.py")
+    args = parser.parse_args()
+    args.distinct = max(1, min(args.distinct, len(QUESTIONS)))
+
+    server = None
+    if not args.url:
+        models = {name: dict(mock_llm.DEFAULT_BEHAVIOUR) for name in mock_llm.DEFAULT_MODELS}
+        models.update(dict(mock_llm.parse_model_spec(spec) for spec in args.model))
+        server = mock_llm.start_server(models)
+        args.url = server.url
+    os.environ["GROQ_API_URL"] = args.url
+    os.environ.setdefault("GROQ_API_KEY", "loadtest")
+
+    results = Results()
+    start = time.perf_counter()
+    if args.mode == "direct":
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            for future in [pool.submit(direct_user, n, args, results) for n in range(args.users)]:
+                future.result()
+    else:
+        with ProcessPoolExecutor(max_workers=args.users) as pool:
+            for future in [pool.submit(app_user, n, args) for n in range(args.users)]:
+                results.merge(*future.result())
+    elapsed = time.perf_counter() - start
+
+    print(results.report(elapsed))
+    counters = metrics.snapshot()["counters"]
+    if args.mode == "direct":
+        print(f"Coalescing: {counters.get('ai.ask.calls', 0)} calls, "
+              f"{counters.get('ai.ask.upstream', 0)} upstream, {counters.get('ai.ask.coalesced', 0)} coalesced")
+        from model_router import router
+        print(f"Models: {router.summary()}")
+    if server:
+        print(f"Mock server: {server.stats}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
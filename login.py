@@ -4,6 +4,8 @@ import json
 import gspread
 from datetime import date
 from oauth2client.service_account import ServiceAccountCredentials
+from mirror import mirrored
+import prefetch
 import re
 import smtplib
 from email.mime.text import MIMEText
@@ -27,7 +29,7 @@ def connect_google_sheet():
         creds_dict = json.loads(creds_json)
         creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
         client = gspread.authorize(creds)
-        return client.open("User").worksheet("Sheet1")
+        return mirrored(client.open("User").worksheet("Sheet1"))
     except Exception as e:
         st.warning(f"⚠️ Could not connect to Google Sheets: {e}")
         return None
@@ -142,6 +144,7 @@ def app():
                             st.session_state.logged_in = True
                             st.session_state.user = user
                             st.session_state.page = "Profile"
+                            prefetch.start(user)
                             st.success(f"✅ Welcome {user['username']}! Redirecting...")
                             st.rerun()
                         else:
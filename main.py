@@ -8,6 +8,7 @@ from contact import app as contact_page
 from message import app as message_page
 from storage import save_state, load_state, clear_state
 from market import app as market_page
+import profiling
 
 # ------------------- PAGE CONFIG -------------------
 st.set_page_config(page_title="🌾 Agriculture Assistant", layout="wide")
@@ -37,9 +38,8 @@ default_state = {
     "page": "Home",
     "logged_in": False,
     "user": None,
-    "ai_history": [],
     "current_topic": None,
-    "user_chats": {},
+    "user_chats": None,
     "redirect_done": False
 }
 
@@ -63,41 +63,20 @@ for item in main_menu:
 with st.sidebar.expander("⚙️ Agri AI Assistant ", expanded=False):
     if st.button("🆕 New Chat", key="ai_new", use_container_width=True):
         st.session_state.current_topic = None
-        st.session_state.ai_history = []
         st.session_state.page = "AI Assistant"
 #        st.rerun()
 
     if st.session_state.logged_in and st.session_state.user:
-        if not st.session_state.user_chats:
-            from ai_assistant import connect_google_sheet
-            sheet = connect_google_sheet()
-            if sheet:
-                try:
-                    rows = sheet.get_all_records()
-                    user_chats = {}
-                    username = st.session_state.user.get("username", "")
-                    for row in rows:
-                        if row.get("username") == username:
-                            topic = row.get("topic", "Untitled")
-                            if topic not in user_chats:
-                                user_chats[topic] = []
-                            user_chats[topic].append({
-                                "timestamp": row.get("timestamp", ""),
-                                "question": row.get("question", ""),
-                                "answer": row.get("answer", "")
-                            })
-                    st.session_state.user_chats = user_chats
-                except Exception:
-                    pass
-
-        if st.session_state.user_chats:
-            topics = list(st.session_state.user_chats.keys())
+        from ai_assistant import chat_session
+        chats = chat_session(st.session_state.user.get("username", ""), wait=False)
+
+        if chats is None:
+            st.caption("📚 Loading saved chats...")
+        elif chats:
+            topics = chats.topic_names()
 
             def set_old_topic():
                 st.session_state.current_topic = st.session_state.selected_old_topic_main
-                st.session_state.ai_history = st.session_state.user_chats.get(
-                    st.session_state.current_topic, []
-                )
                 st.session_state.page = "AI Assistant"
 #                st.rerun()
 
@@ -123,26 +102,27 @@ for item in extra_menu:
 
 # ------------------- PAGE ROUTING -------------------
 page = st.session_state.page
-if page == "Home":
-    home_page()
-elif page == "About":
-    about_page()
-elif page == "AI Assistant":
-    ai_page()
-elif page == "Message":
-    message_page()
-elif page == "Market":
-    market_page()
-elif page == "Contact":
-    contact_page()
-elif page == "Login":
-    login_page()
-elif page == "Profile":
-    profile_page()
+with profiling.profile_page(page, profiling.enabled()):
+    if page == "Home":
+        home_page()
+    elif page == "About":
+        about_page()
+    elif page == "AI Assistant":
+        ai_page()
+    elif page == "Message":
+        message_page()
+    elif page == "Market":
+        market_page()
+    elif page == "Contact":
+        contact_page()
+    elif page == "Login":
+        login_page()
+    elif page == "Profile":
+        profile_page()
 
 # ------------------- SAVE SESSION STATE -------------------
 try:
-    keys_to_save = ["page", "logged_in", "user", "ai_history", "current_topic", "user_chats"]
+    keys_to_save = ["page", "logged_in", "user", "current_topic", "user_chats"]
     state_to_save = {k: st.session_state.get(k) for k in keys_to_save}
     save_state(state_to_save)
 except Exception as e:
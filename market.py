@@ -1,14 +1,22 @@
 import streamlit as st
 import gspread
 import json
+import uuid
 from oauth2client.service_account import ServiceAccountCredentials
-from datetime import datetime, date
+from datetime import date, datetime
+from bulk_listings import parse_listings, template_csv, upload_listings
+from market_index import SORT_KEYS, get_listing_index
+from market_analytics import market_prices
+from mirror import mirrored
+import page_data
+from orders import accept_order, load_orders, place_order, reject_order, to_int
 
 # ---------------- GOOGLE SHEET SETUP ----------------
 SCOPE = [
     "https://spreadsheets.google.com/feeds",
     "https://www.googleapis.com/auth/drive"
 ]
+MARKET_PAGE_SIZE = 25
 
 def connect_google_sheet(sheet_name):
     if "google" not in st.secrets or "secrets_creds" not in st.secrets["google"]:
@@ -19,12 +27,34 @@ def connect_google_sheet(sheet_name):
         creds_dict = json.loads(creds_json)
         creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
         client = gspread.authorize(creds)
-        return client.open("User").worksheet(sheet_name)
+        return mirrored(client.open("User").worksheet(sheet_name))
     except Exception as e:
         st.warning(f"⚠️ Could not connect to Google Sheets: {e}")
         return None
 
 
+def open_listings():
+    """Connect the crops sheet and bring its listing index up to date."""
+    sheet = connect_google_sheet("Sheet5")
+    if sheet:
+        try:
+            get_listing_index(sheet).refresh()
+        except Exception:
+            pass  # reported by the tab that reads the listings
+    return sheet
+
+
+def open_orders():
+    """Connect the orders sheet and load its snapshot."""
+    sheet = connect_google_sheet("Sheet6")
+    if sheet:
+        try:
+            load_orders(sheet)
+        except Exception:
+            pass  # reported by the alert banner / My Orders
+    return sheet
+
+
 # ---------------- MARKET PAGE ----------------
 def app():
     st.title("🌾 Agricultural Market System")
@@ -43,11 +73,14 @@ def app():
     # --- STATE VARIABLE FOR ALERT PAGE ---
     st.session_state.setdefault("view_order_alerts", False)
 
-    # --- CONNECT SHEETS ---
-    market_sheet = connect_google_sheet("Sheet5")  # Crops
-    orders_sheet = connect_google_sheet("Sheet6")  # Orders
+    # --- CONNECT SHEETS (both fetched at once) ---
+    data = page_data.fetch({"market": open_listings, "orders": open_orders})
+    market_sheet = data.get("market")  # Crops
+    orders_sheet = data.get("orders")  # Orders
     if not market_sheet or not orders_sheet:
         st.error("❌ Unable to connect to Google Sheets.")
+        for error in data.errors.values():
+            st.caption(f"{error}")
         return
 
     # =====================================================
@@ -57,9 +90,7 @@ def app():
         st.header("📣 Order Alerts")
 
         try:
-            all_orders = orders_sheet.get_all_records()
-            all_orders = [{k.strip(): v for k, v in row.items()} for row in all_orders]
-            my_sales = [o for o in all_orders if o.get("Farmer Name") == username]
+            my_sales = load_orders(orders_sheet).for_farmer(username)
 
             if my_sales:
                 for order in my_sales:
@@ -84,19 +115,22 @@ def app():
                         if delivery_type == "Pickup":
                             if cols[1].button("✅ Accept", key=f"pickup_accept_{order_id}"):
                                 try:
-                                    row_index = next(i + 2 for i, r in enumerate(all_orders) if r.get("Order ID") == order_id)
-                                    orders_sheet.update_cell(row_index, 8, "Accepted (Pickup)")
-                                    st.success(f"✅ Order {order_id} accepted for pickup.")
-                                    st.rerun()
+                                    if accept_order(orders_sheet, order, "Accepted (Pickup)"):
+                                        st.success(f"✅ Order {order_id} accepted for pickup.")
+                                        st.rerun()
+                                    st.warning(f"⚠️ Order {order_id} was already handled. Refresh to see its status.")
                                 except Exception as e:
                                     st.error(f"Error updating pickup order: {e}")
 
                             if cols[2].button("❌ Reject", key=f"pickup_reject_{order_id}"):
                                 try:
-                                    row_index = next(i + 2 for i, r in enumerate(all_orders) if r.get("Order ID") == order_id)
-                                    orders_sheet.update_cell(row_index, 8, "Rejected")
-                                    st.warning(f"❌ Order {order_id} rejected.")
-                                    st.rerun()
+                                    rejected, restored = reject_order(orders_sheet, market_sheet, order)
+                                    if restored is not None:
+                                        get_listing_index(market_sheet).set_quantity(to_int(order.get("Listing Row")), restored)
+                                    if rejected:
+                                        st.warning(f"❌ Order {order_id} rejected.")
+                                        st.rerun()
+                                    st.warning(f"⚠️ Order {order_id} was already handled. Refresh to see its status.")
                                 except Exception as e:
                                     st.error(f"Error rejecting order: {e}")
 
@@ -117,32 +151,33 @@ def app():
 
                                         if st.button("📦 Confirm Courier Delivery", key=f"confirm_{order_id}"):
                                             try:
-                                                row_index = next(i + 2 for i, r in enumerate(all_orders) if r.get("Order ID") == order_id)
-                                                orders_sheet.update_cell(row_index, 8, "Accepted (Courier)")
-                                                orders_sheet.update_cell(row_index, 9, courier_company)
-                                                orders_sheet.update_cell(row_index, 10, tracking_number)
-                                                orders_sheet.update_cell(row_index, 11, str(expected_date))
-                                                st.success("✅ Courier details saved.")
-                                                st.rerun()
+                                                details = {9: courier_company, 10: tracking_number, 11: str(expected_date)}
+                                                if accept_order(orders_sheet, order, "Accepted (Courier)", details):
+                                                    st.success("✅ Courier details saved.")
+                                                    st.rerun()
+                                                st.warning(f"⚠️ Order {order_id} was already handled. Refresh to see its status.")
                                             except Exception as e:
                                                 st.error(f"Error saving courier details: {e}")
 
                                     elif delivery_choice == "I will deliver to home directly":
                                         if st.button("🚚 Confirm Direct Delivery", key=f"direct_{order_id}"):
                                             try:
-                                                row_index = next(i + 2 for i, r in enumerate(all_orders) if r.get("Order ID") == order_id)
-                                                orders_sheet.update_cell(row_index, 8, "Accepted (Home Delivery)")
-                                                st.success("✅ Marked as direct home delivery.")
-                                                st.rerun()
+                                                if accept_order(orders_sheet, order, "Accepted (Home Delivery)"):
+                                                    st.success("✅ Marked as direct home delivery.")
+                                                    st.rerun()
+                                                st.warning(f"⚠️ Order {order_id} was already handled. Refresh to see its status.")
                                             except Exception as e:
                                                 st.error(f"Error updating delivery: {e}")
 
                             if cols[2].button("❌ Reject", key=f"home_reject_{order_id}"):
                                 try:
-                                    row_index = next(i + 2 for i, r in enumerate(all_orders) if r.get("Order ID") == order_id)
-                                    orders_sheet.update_cell(row_index, 8, "Rejected")
-                                    st.warning(f"❌ Order {order_id} rejected.")
-                                    st.rerun()
+                                    rejected, restored = reject_order(orders_sheet, market_sheet, order)
+                                    if restored is not None:
+                                        get_listing_index(market_sheet).set_quantity(to_int(order.get("Listing Row")), restored)
+                                    if rejected:
+                                        st.warning(f"❌ Order {order_id} rejected.")
+                                        st.rerun()
+                                    st.warning(f"⚠️ Order {order_id} was already handled. Refresh to see its status.")
                                 except Exception as e:
                                     st.error(f"Error rejecting order: {e}")
             else:
@@ -159,9 +194,7 @@ def app():
     # 🔔 ALERT BUTTON (TOP OF PAGE)
     # =====================================================
     try:
-        all_orders = orders_sheet.get_all_records()
-        all_orders = [{k.strip(): v for k, v in row.items()} for row in all_orders]
-        my_sales = [o for o in all_orders if o.get("Farmer Name") == username and o.get("Status") == "Pending"]
+        my_sales = load_orders(orders_sheet).pending_for_farmer(username)
         if my_sales:
             if st.button(f"📣 You have {len(my_sales)} pending order(s)! Click to view"):
                 st.session_state.view_order_alerts = True
@@ -172,7 +205,7 @@ def app():
     # =====================================================
     # 🛒 MAIN TABS
     # =====================================================
-    tab1, tab2, tab3 = st.tabs(["Sell Crops", "View Market", "My Orders"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Sell Crops", "View Market", "My Orders", "Prices"])
 
     # SELL CROPS
     with tab1:
@@ -192,22 +225,123 @@ def app():
 
         if st.button("✅ Post to Market", use_container_width=True):
             try:
-                market_sheet.append_row([username, crop, quantity, price, address, phone, email])
+                listing_id = uuid.uuid4().hex[:12]
+                posted_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                market_sheet.append_row([username, crop, quantity, price, address, phone, email, listing_id, 0,
+                                         posted_at])
+                get_listing_index(market_sheet).invalidate()
                 st.success("🌾 Crop posted successfully!")
             except Exception as e:
                 st.error(f"❌ Failed to post crop: {e}")
 
+        # --- BULK UPLOAD ---
+        with st.expander("📦 Bulk upload (CSV)"):
+            st.caption("Columns: Crop Name, Quantity (kg), Price (₹/kg) and an optional Location "
+                       "(defaults to your address).")
+            st.download_button("⬇️ Download template", template_csv(), file_name="listings_template.csv",
+                               mime="text/csv")
+            upload = st.file_uploader("Listings CSV", type=["csv"], key="bulk_csv")
+            if upload is not None:
+                seller = {"username": username, "address": address, "phone": phone, "email": email}
+                rows, errors = parse_listings(upload, seller)
+                if errors:
+                    st.error("❌ Fix these rows and upload again:\n\n" + "\n".join(f"- {e}" for e in errors))
+                elif not rows:
+                    st.info("The file has no listings.")
+                else:
+                    # Rows of this file already appended, kept across reruns so a retry resumes
+                    progress = st.session_state.get("bulk_progress") or {}
+                    posted = progress.get("posted", 0) if progress.get("file_id") == upload.file_id else 0
+                    remaining = len(rows) - posted
+                    if remaining <= 0:
+                        st.success(f"🌾 {len(rows)} listings from this file are posted.")
+                    else:
+                        if posted:
+                            st.warning(f"⚠️ {posted} of {len(rows)} listings from this file are already live; "
+                                       f"posting again continues with the remaining {remaining}.")
+                        label = f"✅ Post the remaining {remaining} listings" if posted else f"✅ Post {len(rows)} listings"
+                        if st.button(label, key="bulk_post", use_container_width=True):
+                            bar = st.progress(posted / len(rows), text="Posting listings...")
+                            st.session_state.bulk_progress = {"file_id": upload.file_id, "posted": posted}
+
+                            def show_progress(done, total):
+                                st.session_state.bulk_progress["posted"] = done
+                                bar.progress(done / total, text=f"Posted {done}/{total}")
+
+                            try:
+                                upload_listings(market_sheet, rows, show_progress, done=posted)
+                                st.success(f"🌾 {len(rows)} listings posted!")
+                            except Exception as e:
+                                done = st.session_state.bulk_progress["posted"]
+                                st.error(f"❌ Bulk upload stopped after {done} of {len(rows)} listings: {e}. "
+                                         f"Those {done} are live; press Post again to add the rest.")
+                            finally:
+                                get_listing_index(market_sheet).invalidate()
+
     # VIEW MARKET
     with tab2:
         st.subheader("📈 Available Crops in Market")
         try:
-            data = market_sheet.get_all_records()
-            data = [{k.strip(): v for k, v in row.items()} for row in data]
+            index = get_listing_index(market_sheet)
+
+            # --- FILTERS ---
+            f1, f2, f3 = st.columns([2, 2, 3])
+            crop_filter = f1.selectbox("Crop", ["All"] + index.crop_names(), key="mkt_crop")
+            sort_choice = f2.selectbox("Sort by", ["Newest", "Price ↑", "Price ↓", "Quantity ↑", "Quantity ↓"],
+                                       key="mkt_sort")
+            location_filter = f3.text_input("Search location", key="mkt_location")
+            p1, p2 = st.columns(2)
+            min_price = p1.number_input("Min price (₹/kg)", min_value=0.0, value=0.0, key="mkt_min_price")
+            max_price = p2.number_input("Max price (₹/kg)", min_value=0.0, value=0.0, key="mkt_max_price",
+                                        help="0 means no upper limit")
 
-            if not data:
-                st.info("No crops listed yet.")
+            sort_label = sort_choice.split(" ")[0]
+            positions = index.query(
+                crop=None if crop_filter == "All" else crop_filter,
+                min_price=min_price or None,
+                max_price=max_price or None,
+                location=location_filter,
+                min_quantity=1,
+                sort_by=SORT_KEYS.get(sort_label),
+                descending=sort_choice == "Newest" or sort_choice.endswith("↓")
+            )
+
+            if not len(positions):
+                st.info("No crops listed yet." if not index.size else "No listings match your filters.")
             else:
-                for idx, row in enumerate(data):
+                # --- ONE PAGE AS A COMPACT TABLE ---
+                pages = (len(positions) - 1) // MARKET_PAGE_SIZE + 1
+                st.session_state.setdefault("mkt_page", 1)
+                if st.session_state.mkt_page > pages:
+                    st.session_state.mkt_page = 1  # filters shrank the result set
+                n1, n2 = st.columns([1, 3])
+                page = n1.number_input("Page", min_value=1, max_value=pages, key="mkt_page")
+                n2.caption(f"{len(positions)} listing(s) found · page {page} of {pages}")
+                data = index.rows(positions[(page - 1) * MARKET_PAGE_SIZE:page * MARKET_PAGE_SIZE])
+
+                table = [{
+                    "Crop": row.get("Crop Name", ""),
+                    "Qty (kg)": row.get("Quantity (kg)", ""),
+                    "Price (₹/kg)": row.get("Price (₹/kg)", ""),
+                    "Location": row.get("Location", ""),
+                    "Seller": row.get("Farmer Name", ""),
+                    "Phone": row.get("Phone", "")
+                } for row in data]
+                event = st.dataframe(
+                    table, hide_index=True, width="stretch",
+                    on_select="rerun", selection_mode="single-row",
+                    # A new key per filter/page drops selections made on another result set
+                    key=f"mkt_table_{crop_filter}_{sort_choice}_{location_filter}_{min_price}_{max_price}_{page}"
+                )
+
+                # --- CONTROLS ONLY FOR THE SELECTED LISTING ---
+                selected = [i for i in (event.selection.rows if event else []) if 0 <= i < len(data)]
+                if not selected:
+                    st.caption("👆 Select a listing to buy it.")
+                else:
+                    row = data[selected[0]]
+                    idx = row["_row"]
+                    st.markdown("---")
                     st.write(
                         f"**Seller:** {row.get('Farmer Name','')} | "
                         f"**Crop:** {row.get('Crop Name','')} | "
@@ -221,17 +355,24 @@ def app():
                         ["Pickup", "Home Delivery"],
                         key=f"delivery_{idx}"
                     )
+                    available = to_int(row.get("Quantity (kg)"))
+                    buy_qty = st.number_input("Quantity to buy (kg)", min_value=1, max_value=max(available, 1),
+                                              value=max(available, 1), key=f"buy_qty_{idx}")
 
                     buy_button = st.button(f"💰 Buy {row.get('Crop Name','')}", key=f"buy_{idx}")
                     if buy_button:
-                        order_id = datetime.now().strftime("%Y%m%d%H%M%S%f")
-                        orders_sheet.append_row([
-                            order_id, row.get("Crop Name"), row.get("Quantity (kg)"),
-                            row.get("Price (₹/kg)"), username, email,
-                            row.get("Farmer Name"), "Pending", "", "", "", delivery_option
-                        ])
-                        st.success("✅ Order placed! Seller will confirm soon.")
-                    st.markdown("---")
+                        try:
+                            ok, message, remaining = place_order(
+                                market_sheet, orders_sheet, row, int(buy_qty), username, email, delivery_option
+                            )
+                            if remaining is not None:
+                                index.set_quantity(idx, remaining)
+                            if ok:
+                                st.success(f"✅ {message} Seller will confirm soon.")
+                            else:
+                                st.error(f"❌ {message}")
+                        except Exception as e:
+                            st.error(f"❌ Failed to place order: {e}")
         except Exception as e:
             st.error(f"❌ Failed to load market data: {e}")
 
@@ -239,8 +380,7 @@ def app():
     with tab3:
         st.subheader("📦 My Orders (Buyer View)")
         try:
-            all_orders = orders_sheet.get_all_records()
-            my_orders = [o for o in all_orders if o.get("Buyer Name") == username]
+            my_orders = load_orders(orders_sheet).for_buyer(username)
             if not my_orders:
                 st.info("No orders placed yet.")
             else:
@@ -253,4 +393,29 @@ def app():
                         st.write(f"📅 Expected: {order.get('Expected Delivery','N/A')}")
                     st.markdown("---")
         except Exception as e:
-            st.error(f"❌ Failed to load your orders: {e}")
\ No newline at end of file
+            st.error(f"❌ Failed to load your orders: {e}")
+
+    # PRICE ANALYTICS
+    with tab4:
+        st.subheader("📊 Crop Price Trends")
+        try:
+            prices = market_prices(get_listing_index(market_sheet), load_orders(orders_sheet))
+            if not prices["by_crop"]:
+                st.info("No price data yet.")
+            else:
+                columns = {
+                    "count": "Offers", "min": "Min ₹/kg", "median": "Median ₹/kg", "max": "Max ₹/kg",
+                    "listed_kg": "Listed kg", "sold_kg": "Sold kg", "avg_7d": "7-day avg",
+                    "avg_30d": "30-day avg", "trend_7d_pct": "7-day trend %"
+                }
+                st.dataframe([{columns.get(k, k): v for k, v in row.items() if k != "Location"}
+                              for row in prices["by_crop"]],
+                             hide_index=True, width="stretch")
+
+                crop_names = [row["Crop"] for row in prices["by_crop"]]
+                chosen = st.selectbox("Prices by location for", crop_names, key="price_crop")
+                st.dataframe([{columns.get(k, k): v for k, v in row.items() if k != "Crop"}
+                              for row in prices["by_location"] if row["Crop"] == chosen],
+                             hide_index=True, width="stretch")
+        except Exception as e:
+            st.error(f"❌ Failed to load price analytics: {e}")
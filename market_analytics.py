@@ -0,0 +1,202 @@
+# market_analytics.py
+import threading
+from datetime import date, datetime
+
+import numpy as np
+import streamlit as st
+
+from market_index import Categories, to_number
+from orders import to_int
+
+# ---------------- SETTINGS ----------------
+POSTED_FORMAT = "%Y-%m-%d %H:%M:%S"
+ORDER_ID_FORMAT = "%Y%m%d%H%M%S%f"  # order ids are their creation time
+
+
+def day_number(value, fmt):
+    """Days since 0001-01-01 for a timestamp string, or -1 if unknown."""
+    try:
+        return datetime.strptime(str(value).strip(), fmt).toordinal()
+    except ValueError:
+        return -1
+
+
+# ---------------- GROUPED STATISTICS ----------------
+def grouped_summary(keys, price, qty, sold, day, today):
+    """
+    Price statistics per group key, fully vectorized.
+    Returns (group keys, dict of per-group arrays).
+    """
+    groups, inverse = np.unique(keys, return_inverse=True)
+    n = len(groups)
+    counts = np.bincount(inverse, minlength=n)
+
+    # Sort by (group, price) once: min, max and median are then index lookups
+    order = np.lexsort((price, inverse))
+    sorted_price = price[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    median = (sorted_price[starts + (counts - 1) // 2] + sorted_price[starts + counts // 2]) / 2
+
+    def window_mean(newest, oldest):
+        """Mean price over days (today - oldest, today - newest]."""
+        mask = (day > today - oldest) & (day <= today - newest)
+        total = np.bincount(inverse[mask], weights=price[mask], minlength=n)
+        seen = np.bincount(inverse[mask], minlength=n)
+        return np.where(seen > 0, total / np.maximum(seen, 1), np.nan)
+
+    avg_7 = window_mean(0, 7)
+    prev_7 = window_mean(7, 14)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        trend_7 = (avg_7 - prev_7) / prev_7 * 100
+    return groups, {
+        "count": counts,
+        "min": sorted_price[starts],
+        "median": median,
+        "max": sorted_price[starts + counts - 1],
+        "listed_kg": np.bincount(inverse, weights=np.where(sold, 0.0, qty), minlength=n),
+        "sold_kg": np.bincount(inverse, weights=np.where(sold, qty, 0.0), minlength=n),
+        "avg_7d": avg_7,
+        "avg_30d": window_mean(0, 30),
+        "trend_7d_pct": trend_7,
+    }
+
+
+# ---------------- PRICE ANALYTICS ----------------
+class PriceAnalytics:
+    """
+    Per-crop and per-location price observations kept in compact arrays.
+
+    Listings and accepted orders are ingested once each as they appear;
+    statistics are recomputed only when new observations arrived. A listing
+    observation remembers its ListingIndex position, and its quantity follows
+    the listing's current stock, so kilos sold through orders leave "Listed
+    kg" as they enter "Sold kg".
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.crops = Categories()
+        self.locations = Categories()
+        self.size = 0
+        self.crop = np.empty(0, dtype=np.int32)
+        self.location = np.empty(0, dtype=np.int32)
+        self.price = np.empty(0, dtype=np.float64)
+        self.qty = np.empty(0, dtype=np.float64)
+        self.day = np.empty(0, dtype=np.int32)
+        self.sold = np.empty(0, dtype=bool)
+        self.listing = np.empty(0, dtype=np.int32)  # ListingIndex position, -1 for orders
+        self.listings_seen = 0
+        self.orders_seen = set()
+        self.version = 0
+        self.cached = None  # (version, today, stats)
+
+    def _append(self, observations):
+        if not observations:
+            return
+        crop, location, price, qty, day, sold, listing = zip(*observations)
+        self.crop = np.concatenate((self.crop[:self.size], np.array(crop, dtype=np.int32)))
+        self.location = np.concatenate((self.location[:self.size], np.array(location, dtype=np.int32)))
+        self.price = np.concatenate((self.price[:self.size], np.array(price, dtype=np.float64)))
+        self.qty = np.concatenate((self.qty[:self.size], np.array(qty, dtype=np.float64)))
+        self.day = np.concatenate((self.day[:self.size], np.array(day, dtype=np.int32)))
+        self.sold = np.concatenate((self.sold[:self.size], np.array(sold, dtype=bool)))
+        self.listing = np.concatenate((self.listing[:self.size], np.array(listing, dtype=np.int32)))
+        self.size += len(observations)
+        self.version += 1
+
+    def _observation(self, crop, location, price, qty, day, sold, listing=-1):
+        price = to_number(price)
+        if np.isnan(price):
+            return None
+        qty = to_number(qty)
+        return (self.crops.code(crop), self.locations.code(str(location or "").strip().title()),
+                price, 0.0 if np.isnan(qty) else qty, day, sold, listing)
+
+    # ---------- INGESTION ----------
+    def ingest_listings(self, index):
+        """Add listings appended to the ListingIndex since the last call and follow stock changes."""
+        with index.lock:
+            new_records = index.records[self.listings_seen:index.size]
+            stock = index.quantity[:index.size].copy()
+        with self.lock:
+            observations = [self._observation(
+                r.get("Crop Name"), r.get("Location"), r.get("Price (₹/kg)"), r.get("Quantity (kg)"),
+                day_number(r.get("Posted At", ""), POSTED_FORMAT), False, self.listings_seen + i
+            ) for i, r in enumerate(new_records)]
+            self._append([o for o in observations if o])
+            self.listings_seen += len(new_records)
+
+            listed = np.flatnonzero((self.listing[:self.size] >= 0) & (self.listing[:self.size] < len(stock)))
+            current = np.nan_to_num(stock[self.listing[listed]])
+            if not np.array_equal(self.qty[listed], current):
+                self.qty[listed] = current
+                self.version += 1
+
+    def ingest_orders(self, snapshot, index):
+        """Add orders that became accepted since the last call."""
+        with self.lock:
+            accepted = [o for o in snapshot.orders
+                        if str(o.get("Status", "")).startswith("Accepted")
+                        and str(o.get("Order ID")) not in self.orders_seen]
+            observations = []
+            for order in accepted:
+                self.orders_seen.add(str(order.get("Order ID")))
+                listing_row = to_int(order.get("Listing Row"))
+                location = ""
+                if 2 <= listing_row < index.size + 2:
+                    location = index.records[listing_row - 2].get("Location", "")
+                observations.append(self._observation(
+                    order.get("Crop Name"), location, order.get("Price"), order.get("Quantity"),
+                    day_number(order.get("Order ID"), ORDER_ID_FORMAT), True
+                ))
+            self._append([o for o in observations if o])
+
+    # ---------- STATISTICS ----------
+    def stats(self, today=None):
+        """{"by_crop": [...], "by_location": [...]} rows ready for a table."""
+        today = (today or date.today()).toordinal()
+        with self.lock:
+            if self.cached and self.cached[:2] == (self.version, today):
+                return self.cached[2]
+            n = self.size
+            crop, location = self.crop[:n], self.location[:n]
+            price, qty, day, sold = self.price[:n], self.qty[:n], self.day[:n], self.sold[:n]
+            crop_names, location_names = list(self.crops.values), list(self.locations.values)
+            version = self.version
+
+        result = {"by_crop": [], "by_location": []}
+        if n:
+            groups, summary = grouped_summary(crop, price, qty, sold, day, today)
+            result["by_crop"] = table_rows(summary, [(crop_names[g], "All") for g in groups])
+            width = max(len(location_names), 1)
+            groups, summary = grouped_summary(crop * width + location, price, qty, sold, day, today)
+            result["by_location"] = table_rows(
+                summary, [(crop_names[g // width], location_names[g % width] or "Unknown") for g in groups]
+            )
+        with self.lock:
+            self.cached = (version, today, result)
+        return result
+
+
+def table_rows(summary, labels):
+    rows = []
+    for i, (crop, location) in enumerate(labels):
+        row = {"Crop": crop, "Location": location}
+        for key, values in summary.items():
+            value = values[i].item()
+            row[key] = None if isinstance(value, float) and np.isnan(value) else round(value, 2)
+        rows.append(row)
+    return rows
+
+
+@st.cache_resource(show_spinner=False)
+def get_price_analytics():
+    return PriceAnalytics()
+
+
+def market_prices(index, snapshot):
+    """Bring analytics up to date with the listing index and orders snapshot."""
+    analytics = get_price_analytics()
+    analytics.ingest_listings(index)
+    analytics.ingest_orders(snapshot, index)
+    return analytics.stats()
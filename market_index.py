@@ -0,0 +1,229 @@
+# market_index.py
+import threading
+import time
+
+import numpy as np
+import streamlit as st
+
+import shared_cache
+
+# ---------------- SETTINGS ----------------
+LISTING_COLUMNS = ["Farmer Name", "Crop Name", "Quantity (kg)", "Price (₹/kg)", "Location", "Phone", "Email",
+                   "Listing ID", "Version", "Posted At"]
+REFRESH_INTERVAL = 30  # seconds before listings posted by other processes are picked up
+TOPIC = "Sheet5"  # shared-cache topic announced on every listing change
+SORT_KEYS = {"Price": "price", "Quantity": "quantity"}
+
+
+def to_number(value):
+    try:
+        return float(str(value).replace(",", "").strip())
+    except ValueError:
+        return np.nan
+
+
+class Categories:
+    """Interns repeated strings (crop, location, seller) as small int codes."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        value = str(value or "").strip()
+        if value not in self.codes:
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+        return self.codes[value]
+
+    def matching(self, predicate):
+        return np.array([code for code, value in enumerate(self.values) if predicate(value)], dtype=np.int32)
+
+
+# ---------------- LISTING INDEX ----------------
+class ListingIndex:
+    """
+    In-memory columnar index over the market sheet (Sheet5).
+
+    Listing i lives in sheet row i + 2. Numeric columns are NumPy arrays and
+    string columns are interned to codes, so filters and sorts are vectorized.
+    """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.lock = threading.RLock()
+        self.header = LISTING_COLUMNS
+        self.records = []
+        self.crops = Categories()
+        self.locations = Categories()
+        self.sellers = Categories()
+        self.size = 0
+        self._allocate(1024)
+        self.loaded = False
+        self.stale = False
+        self.refreshed_at = 0.0
+        self.version = 0  # shared-cache version of TOPIC reflected here
+
+    def _allocate(self, capacity):
+        def grow(old, dtype, fill):
+            new = np.full(capacity, fill, dtype=dtype)
+            if old is not None:
+                new[:self.size] = old[:self.size]
+            return new
+        self.price = grow(getattr(self, "price", None), np.float64, np.nan)
+        self.quantity = grow(getattr(self, "quantity", None), np.float64, np.nan)
+        self.crop = grow(getattr(self, "crop", None), np.int32, -1)
+        self.location = grow(getattr(self, "location", None), np.int32, -1)
+        self.seller = grow(getattr(self, "seller", None), np.int32, -1)
+
+    # ---------- LOADING ----------
+    def _add_values(self, values):
+        values = list(values) + [""] * (len(self.header) - len(values))
+        record = dict(zip(self.header, values))
+        if self.size == len(self.price):
+            self._allocate(len(self.price) * 2)
+        i = self.size
+        record["_row"] = i + 2
+        self.records.append(record)
+        self.price[i] = to_number(record.get("Price (₹/kg)"))
+        self.quantity[i] = to_number(record.get("Quantity (kg)"))
+        self.crop[i] = self.crops.code(record.get("Crop Name"))
+        self.location[i] = self.locations.code(str(record.get("Location", "")).lower())
+        self.seller[i] = self.sellers.code(record.get("Farmer Name"))
+        self.size += 1
+
+    def _load_all(self):
+        self.version = shared_cache.topic_version(TOPIC)
+        values = shared_cache.sheet_values(self.sheet, TOPIC)
+        self.records = []
+        self.size = 0
+        if values:
+            header = [str(h).strip() for h in values[0]]
+            self.header = header + LISTING_COLUMNS[len(header):]
+        for row in values[1:]:
+            self._add_values(row)
+        self.loaded = True
+
+    def _load_tail(self):
+        start = self.size + 2
+        for row in self.sheet.get_values(f"A{start}:{column_letter(len(self.header))}"):
+            self._add_values(row)
+
+    def _load_changes(self, version):
+        """New listings plus the current stock of known ones, in one batched read."""
+        if "Quantity (kg)" not in self.header:
+            self._load_all()
+            return
+        quantity = column_letter(self.header.index("Quantity (kg)") + 1)
+        ranges = [f"A{self.size + 2}:{column_letter(len(self.header))}"]
+        if self.size:
+            ranges += [f"{quantity}2:{quantity}{self.size + 1}", f"A2:A{self.size + 1}"]
+        tail, stock, first = (list(self.sheet.batch_get(ranges)) + [[], []])[:3]
+        if self.shifted(first):
+            self._load_all()  # rows were deleted by hand, so row numbers have moved
+            return
+        self.version = version
+        stock = list(stock) + [[]] * (self.size - len(stock))  # blank trailing cells are not returned
+        for i, row in enumerate(stock[:self.size]):
+            value = row[0] if row else ""
+            self.quantity[i] = to_number(value)
+            self.records[i]["Quantity (kg)"] = value
+        for row in tail:
+            self._add_values(row)
+
+    def shifted(self, first_column):
+        """True if the sheet's first column no longer matches the known rows, e.g. after a deletion."""
+        first = [row[0] if row else "" for row in first_column]
+        first += [""] * (self.size - len(first))
+        known = [str(r.get(self.header[0], "")) for r in self.records[:self.size]]
+        return first != known
+
+    def refresh(self):
+        with self.lock:
+            due = time.time() - self.refreshed_at > REFRESH_INTERVAL
+            version = shared_cache.topic_version(TOPIC)
+            if not self.loaded:
+                self._load_all()
+            elif version != self.version:
+                self._load_changes(version)  # another replica added listings or changed stock
+            elif self.stale or due:
+                self._load_tail()
+            else:
+                return
+            self.stale = False
+            self.refreshed_at = time.time()
+
+    def set_quantity(self, listing_row, quantity):
+        """Apply a stock change made by an order without reloading."""
+        with self.lock:
+            i = listing_row - 2
+            if 0 <= i < self.size:
+                self.quantity[i] = quantity
+                self.records[i]["Quantity (kg)"] = quantity
+            self._announce()
+
+    def invalidate(self):
+        """Pick up newly appended listings on the next query."""
+        with self.lock:
+            self.stale = True
+            self._announce()
+
+    def _announce(self):
+        """Tell other replicas about a change this process already applied."""
+        version = shared_cache.notify(TOPIC)
+        if version == self.version + 1:
+            self.version = version  # nobody else changed listings in between
+
+    # ---------- QUERIES ----------
+    def crop_names(self):
+        self.refresh()
+        with self.lock:
+            present = set(self.crop[:self.size].tolist())
+            return sorted(v for code, v in enumerate(self.crops.values) if code in present and v)
+
+    def query(self, crop=None, min_price=None, max_price=None, location=None, seller=None,
+              min_quantity=None, sort_by=None, descending=False):
+        """Return sheet-order positions of matching listings, sorted as asked."""
+        self.refresh()
+        with self.lock:
+            n = self.size
+            mask = np.ones(n, dtype=bool)
+            if crop:
+                code = self.crops.codes.get(str(crop).strip(), -1)
+                mask &= self.crop[:n] == code
+            if min_price is not None:
+                mask &= self.price[:n] >= min_price
+            if max_price is not None:
+                mask &= self.price[:n] <= max_price
+            if min_quantity is not None:
+                mask &= self.quantity[:n] >= min_quantity
+            if location:
+                text = str(location).strip().lower()
+                mask &= np.isin(self.location[:n], self.locations.matching(lambda v: text in v))
+            if seller:
+                mask &= self.seller[:n] == self.sellers.codes.get(str(seller).strip(), -1)
+            positions = np.flatnonzero(mask)
+            if sort_by in SORT_KEYS.values():
+                keys = getattr(self, sort_by)[positions]
+                order = np.argsort(-keys if descending else keys, kind="stable")
+                positions = positions[order]
+            elif descending:
+                positions = positions[::-1]
+            return positions
+
+    def rows(self, positions):
+        with self.lock:
+            return [self.records[i] for i in positions]
+
+
+def column_letter(n):
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters or "A"
+
+
+@st.cache_resource(show_spinner=False)
+def get_listing_index(_sheet):
+    return ListingIndex(_sheet)
@@ -1,8 +1,14 @@
 import streamlit as st
-import json, uuid, gspread
+import json, os, threading, time, uuid, gspread
 from datetime import datetime
 from oauth2client.service_account import ServiceAccountCredentials
-from comments import add_comment_gsheet, load_comments_gsheet
+from streamlit_autorefresh import st_autorefresh
+import archive
+import page_data
+import prefetch
+from mirror import live, mirrored
+from comments import (add_comment_gsheet, apply_new_comments, cached_comment_count, load_archived_thread,
+                      load_comment_thread, load_new_comments, read_comment_row_count, sync_archive_generation)
 
 # ---------- GOOGLE CONFIG ----------
 SCOPE = [
@@ -10,6 +16,11 @@ SCOPE = [
     "https://www.googleapis.com/auth/drive"
 ]
 
+MESSAGE_COLUMNS = ["id", "user", "text", "likes", "time"]
+PAGE_SIZE = int(os.environ.get("MESSAGE_PAGE_SIZE", 20))
+TAIL_CHECK_INTERVAL = 5  # seconds between checks for rows appended elsewhere
+POLL_INTERVAL = 10  # seconds between live-update polls; viewers share each poll
+
 
 # ---------- CONNECT ----------
 @st.cache_resource(show_spinner=False)
@@ -20,12 +31,64 @@ def connect_message_sheet():
         creds_dict = json.loads(creds_json)
         creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
         client = gspread.authorize(creds)
-        return client.open("User").worksheet("Sheet3")
+        return mirrored(client.open("User").worksheet("Sheet3"))
     except Exception as e:
         st.warning(f"⚠️ Could not connect to Message Sheet: {e}")
         return None
 
 
+# ---------- MESSAGE INDEX ----------
+class MessageIndex:
+    """
+    Tracks where the newest message row is so pages can be read by range.
+
+    The full id column is read once per process; afterwards only rows
+    appended below the last known one are probed for.
+    """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.lock = threading.Lock()
+        self.last_row = None      # sheet row of the newest message (1 = header only)
+        self.checked_at = 0.0
+        self.generation = archive.generation("Sheet3")
+
+    def newest_row(self):
+        with self.lock:
+            if self.last_row is None:
+                self.last_row = max(len(self.sheet.col_values(1)), 1)
+            elif time.time() - self.checked_at > TAIL_CHECK_INTERVAL:
+                if archive.generation("Sheet3") != self.generation:
+                    # Old rows were archived, so row numbers have shifted
+                    self.generation = archive.generation("Sheet3")
+                    self.last_row = max(len(self.sheet.col_values(1)), 1)
+                else:
+                    self.last_row += len(self.sheet.get_values(f"A{self.last_row + 1}:A"))
+            else:
+                return self.last_row
+            self.checked_at = time.time()
+            return self.last_row
+
+    def invalidate(self):
+        with self.lock:
+            self.checked_at = 0.0
+
+
+@st.cache_resource(show_spinner=False)
+def get_message_index(_sheet):
+    return MessageIndex(_sheet)
+
+
+def rows_to_messages(values, first_row):
+    messages = []
+    for offset, values_row in enumerate(values):
+        values_row = list(values_row) + [""] * (len(MESSAGE_COLUMNS) - len(values_row))
+        msg = dict(zip(MESSAGE_COLUMNS, values_row))
+        msg["_row"] = first_row + offset
+        messages.append(msg)
+    return messages
+
+
 # ---------- LOAD MESSAGES ----------
 def load_messages_gsheet():
     try:
@@ -39,6 +102,129 @@ def load_messages_gsheet():
         return []
 
 
+def load_messages_page(cursor=None, page_size=PAGE_SIZE):
+    """
+    Load messages from row `cursor` down to the newest one, oldest first.
+
+    With no cursor the newest `page_size` messages are returned. Returns
+    (messages, cursor, has_more) where cursor is the first row loaded.
+    Raises when the sheet cannot be read.
+    """
+    sheet = connect_message_sheet()
+    if not sheet:
+        raise RuntimeError("Message sheet not found.")
+    newest = get_message_index(sheet).newest_row()
+    if newest < 2:
+        return [], None, False
+    if cursor is None:
+        cursor = max(2, newest - page_size + 1)
+    cursor = min(max(2, cursor), newest)
+    values = sheet.get_values(f"A{cursor}:E{newest}")
+    return rows_to_messages(values, cursor), cursor, cursor > 2
+
+
+def load_messages_range(first_row, last_row):
+    """Load messages stored in sheet rows first_row..last_row, oldest first."""
+    try:
+        sheet = connect_message_sheet()
+        if not sheet or last_row < first_row:
+            return []
+        return rows_to_messages(sheet.get_values(f"A{first_row}:E{last_row}"), first_row)
+    except Exception as e:
+        st.error(f"❌ Error loading messages: {e}")
+        return []
+
+
+# ---------- LIVE UPDATES ----------
+def load_feed(page_size=PAGE_SIZE):
+    """
+    Build a session feed holding the newest page of messages. Raises when
+    the messages could not be read, so an empty feed is never cached.
+    """
+    get_message_index(connect_message_sheet()).invalidate()
+    data = page_data.fetch({
+        "messages": lambda: load_messages_page(page_size=page_size),
+        "comment_row": read_comment_row_count
+    })
+    if "messages" in data.errors:
+        raise data.errors["messages"]
+    messages, cursor, _ = data["messages"]
+    comment_row = data.get("comment_row")
+    return {
+        "cursor": cursor or 2,
+        "newest": messages[-1]["_row"] if messages else 1,
+        "messages": messages,
+        "comment_row": comment_row,
+        "archived_loaded": 0,
+        "generation": feed_generation()
+    }
+
+
+def feed_generation():
+    return archive.generation("Sheet3"), archive.generation("Sheet4")
+
+
+def load_archived_messages(offset, limit=PAGE_SIZE):
+    """A page of archived messages older than the hot sheet, oldest first."""
+    try:
+        rows = archive.load_archived("Sheet3", offset, limit)
+    except Exception as e:
+        st.error(f"❌ Error loading archived messages: {e}")
+        return []
+    for row in rows:
+        row["_row"] = None
+        row["archived"] = True
+    return rows[::-1]
+
+
+@st.cache_data(ttl=POLL_INTERVAL, show_spinner=False)
+def read_changes(newest, likes_from, comment_row):
+    """
+    Everything that changed since a feed cursor, in two cheap range reads:
+    message rows appended after `newest`, the likes column from `likes_from`
+    to `newest`, and comments appended after `comment_row`.
+    """
+    sheet = connect_message_sheet()
+    if not sheet:
+        return {"messages": [], "likes": {}, "comments": []}
+    ranges = [f"A{newest + 1}:E"]
+    if newest >= likes_from:
+        ranges.append(f"D{likes_from}:D{newest}")
+    data = page_data.fetch({
+        "messages": lambda: list(sheet.batch_get(ranges)),
+        "comments": lambda: load_new_comments(comment_row) if comment_row else []
+    })
+    if data.errors:
+        raise next(iter(data.errors.values()))
+    new_values, likes_values = (data["messages"] + [[]])[:2]
+    likes = {likes_from + i: (row[0] if row else 0) for i, row in enumerate(likes_values)}
+    return {
+        "messages": rows_to_messages(new_values, newest + 1),
+        "likes": likes,
+        "comments": data["comments"]
+    }
+
+
+def apply_changes(feed):
+    """Patch a session feed in place with the latest changes."""
+    # Round the likes window down to a page boundary so viewers share polls
+    likes_from = max(2, feed["cursor"] - (feed["cursor"] - 2) % PAGE_SIZE)
+    try:
+        changes = read_changes(feed["newest"], likes_from, feed["comment_row"])
+    except Exception as e:
+        st.warning(f"⚠️ Could not check for new messages: {e}")
+        return
+    for msg in feed["messages"]:
+        if msg["_row"] and msg["_row"] in changes["likes"]:
+            msg["likes"] = changes["likes"][msg["_row"]]
+    if changes["messages"]:
+        feed["messages"].extend(changes["messages"])
+        feed["newest"] = changes["messages"][-1]["_row"]
+    if changes["comments"]:
+        apply_new_comments(changes["comments"])
+        feed["comment_row"] = changes["comments"][-1]["_row"]
+
+
 # ---------- ADD MESSAGE ----------
 def add_message_gsheet(username, text):
     try:
@@ -54,17 +240,26 @@ def add_message_gsheet(username, text):
             datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         ]
         sheet.append_row(new_row)
+        get_message_index(sheet).invalidate()
     except Exception as e:
         st.error(f"❌ Could not send message: {e}")
 
 
 # ---------- UPDATE LIKES ----------
-def update_likes_gsheet(msg_id):
+def update_likes_gsheet(msg_id, row=None):
     try:
         sheet = connect_message_sheet()
         if not sheet:
             return
-        data = sheet.get_all_records()
+        # Likes are read-modify-write: read the live sheet, a lagging mirror would lose increments
+        if row:
+            # Fast path: the feed knows the row, just confirm it still holds this id
+            values = live(sheet).get_values(f"A{row}:D{row}")
+            if values and str(values[0][0]) == str(msg_id):
+                likes = values[0][3] if len(values[0]) > 3 else 0
+                sheet.update_cell(row, 4, int(likes or 0) + 1)
+                return
+        data = live(sheet).get_all_records()
         for i, row in enumerate(data, start=2):  # start=2 skips header
             if str(row["id"]) == str(msg_id):
                 new_likes = int(row["likes"]) + 1
@@ -137,6 +332,7 @@ def app():
             if submitted:
                 if text.strip():
                     add_message_gsheet(username, text)
+                    read_changes.clear()
                     st.success("✅ Message sent!")
                     st.session_state.show_post_box = False
                     st.rerun()
@@ -145,11 +341,29 @@ def app():
 
     st.divider()
 
+    # ---------- Live Updates ----------
+    if st.toggle("🔴 Live updates", value=True, key="msg_live"):
+        st_autorefresh(interval=POLL_INTERVAL * 1000, key="msg_autorefresh")
+
     # ---------- Show Messages ----------
-    messages = load_messages_gsheet()
+    if "msg_feed" not in st.session_state or st.session_state.msg_feed["generation"] != feed_generation():
+        sync_archive_generation()
+        feed = prefetch.take("feed", username, prefetch.TAKE_WAIT)  # warmed right after login
+        if not feed or feed["generation"] != feed_generation():
+            try:
+                feed = load_feed()
+            except Exception as e:
+                st.error(f"❌ Error loading messages: {e}")
+                return
+        st.session_state.msg_feed = feed
+    feed = st.session_state.msg_feed
+    apply_changes(feed)
+
+    messages = feed["messages"]
     if not messages:
         st.info("No messages yet.")
         return
+    open_threads = st.session_state.setdefault("open_threads", set())
 
     for msg in reversed(messages):  # newest first
         msg_id = msg.get("id")
@@ -165,30 +379,57 @@ def app():
         st.caption(f"🕒 {time_msg}")
 
         # ❤️ Like button
-        if st.button(f"❤️ {likes_msg}", key=f"like_{msg_id}"):
-            update_likes_gsheet(msg_id)
+        if st.button(f"❤️ {likes_msg}", key=f"like_{msg_id}", disabled=msg.get("archived", False)):
+            update_likes_gsheet(msg_id, msg["_row"])
+            msg["likes"] = int(likes_msg or 0) + 1
+            read_changes.clear()
             st.rerun()
 
-        # 💬 Comments Expander
-        with st.expander("💬 Comments", expanded=False):
-            comments = load_comments_gsheet(msg_id)
-            if comments:
-                for c in comments:
-                    st.markdown(f"**{c.get('user')}:** {c.get('text','')}")
-                    st.caption(f"🕓 {c.get('time','')}")
-            else:
-                st.caption("No comments yet.")
-
-        # Add Comment
-            with st.form(f"comment_form_{msg_id}", clear_on_submit=True):
-                comment_text = st.text_area("Reply...", key=f"comment_input_{msg_id}", height=50)
-                comment_submitted = st.form_submit_button("Reply")
-                if comment_submitted:
-                    if comment_text.strip():
-                        add_comment_gsheet(msg_id, username, comment_text.strip())
-                        st.success("✅ Comment added!")
-                        st.rerun()
-                    else:
-                        st.warning("Please type a comment before submitting.")
-
-        st.divider()
\ No newline at end of file
+        # 💬 Comments (loaded only when opened)
+        count = cached_comment_count(msg_id)
+        label = "💬 Comments" if count is None else f"💬 Comments ({count})"
+        if st.button(label, key=f"toggle_comments_{msg_id}"):
+            open_threads.symmetric_difference_update({msg_id})
+            st.rerun()
+
+        if msg_id in open_threads:
+            with st.container(border=True):
+                comments = load_comment_thread(msg_id)
+                if msg.get("archived"):
+                    comments = load_archived_thread(msg_id, archive.generation("Sheet4")) + comments
+                if comments:
+                    for c in comments:
+                        st.markdown(f"**{c.get('user')}:** {c.get('text','')}")
+                        st.caption(f"🕓 {c.get('time','')}")
+                else:
+                    st.caption("No comments yet.")
+
+                # Add Comment
+                with st.form(f"comment_form_{msg_id}", clear_on_submit=True):
+                    comment_text = st.text_area("Reply...", key=f"comment_input_{msg_id}", height=50)
+                    comment_submitted = st.form_submit_button("Reply")
+                    if comment_submitted:
+                        if comment_text.strip():
+                            add_comment_gsheet(msg_id, username, comment_text.strip())
+                            read_changes.clear()
+                            st.success("✅ Comment added!")
+                            st.rerun()
+                        else:
+                            st.warning("Please type a comment before submitting.")
+
+        st.divider()
+
+    # ---------- Load More ----------
+    # Hot rows first; once the top of the hot sheet is reached, page into the archive
+    has_archived = feed["archived_loaded"] < archive.archived_count("Sheet3")
+    if (feed["cursor"] > 2 or has_archived) and st.button(
+            "⬇️ Load older messages", use_container_width=True, key="msg_load_more"):
+        if feed["cursor"] > 2:
+            first_row = max(2, feed["cursor"] - PAGE_SIZE)
+            feed["messages"][:0] = load_messages_range(first_row, feed["cursor"] - 1)
+            feed["cursor"] = first_row
+        else:
+            older = load_archived_messages(feed["archived_loaded"])
+            feed["messages"][:0] = older
+            feed["archived_loaded"] += len(older)
+        st.rerun()
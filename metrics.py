@@ -0,0 +1,68 @@
+# metrics.py
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# ------------------- SETTINGS -------------------
+TIMING_WINDOW = 500  # recent observations kept per timing metric
+
+_lock = threading.Lock()
+_counters = {}
+_timings = {}
+
+
+# ------------------- RECORDING -------------------
+def incr(name, value=1):
+    """Increase a process-wide counter."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name, seconds):
+    """Record one timing observation (in seconds)."""
+    with _lock:
+        _timings.setdefault(name, deque(maxlen=TIMING_WINDOW)).append(seconds)
+
+
+@contextmanager
+def timer(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+# ------------------- REPORTING -------------------
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def snapshot():
+    """Return counters and timing summaries as a plain dict."""
+    with _lock:
+        counters = dict(_counters)
+        timings = {name: list(values) for name, values in _timings.items()}
+    return {
+        "counters": counters,
+        "timings": {
+            name: {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "max": max(values) if values else 0.0
+            }
+            for name, values in timings.items()
+        }
+    }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timings.clear()
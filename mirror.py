@@ -0,0 +1,439 @@
+# mirror.py
+"""
+Local read replica of the app's worksheets.
+
+A standalone sync process copies every mirrored worksheet into an indexed
+SQLite file on the app host:
+
+    python mirror.py                # sync forever, every KISSAN_MIRROR_INTERVAL seconds
+    python mirror.py --once         # one pass over all sheets
+    python mirror.py --status       # replication lag per sheet
+
+The app wraps its worksheets with mirrored(). Reads are then answered from
+the mirror while it is fresh, and writes go to the sheet first and are then
+applied to the mirror, so a user sees their own change at once. When the
+mirror file is missing, or a sheet lags more than MAX_LAG seconds (sync
+process down), reads go to the live sheet as before. The choice is made on
+every read, so an app started before the sync process switches over once
+the mirror file appears.
+
+Each pass rewrites only rows that changed and announces changed sheets
+through shared_cache, so the app's in-process caches pick them up.
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from gspread.utils import numericise_all
+
+import archive
+import metrics
+import shared_cache
+
+# ---------- SETTINGS ----------
+MIRROR_PATH = os.environ.get("KISSAN_MIRROR", os.path.join("cache", "mirror.sqlite3"))
+SYNC_INTERVAL = float(os.environ.get("KISSAN_MIRROR_INTERVAL", "5"))  # seconds between passes
+MAX_LAG = float(os.environ.get("KISSAN_MIRROR_MAX_LAG", "60"))  # older mirrors are not read
+MIRRORED_SHEETS = ["Sheet1", "Sheet3", "Sheet4", "Sheet5", "Sheet6", "ai data"]
+STORE_CHECK_INTERVAL = 10  # seconds between looks for a mirror file that does not exist yet
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheets (
+    sheet TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL DEFAULT 0,        -- last row number, header included
+    width INTEGER NOT NULL DEFAULT 0,
+    synced_at REAL NOT NULL DEFAULT 0,      -- when the last applied snapshot was read
+    stale_since REAL NOT NULL DEFAULT 0     -- set when an app write could not be mirrored
+);
+CREATE TABLE IF NOT EXISTS cells (
+    sheet TEXT NOT NULL, row INTEGER NOT NULL, data TEXT NOT NULL,
+    written_at REAL NOT NULL DEFAULT 0,     -- app write-through time, 0 if from a snapshot
+    PRIMARY KEY (sheet, row)
+) WITHOUT ROWID;
+"""
+
+A1_RANGE = re.compile(r"^(?:[^!]+!)?([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+
+def column_number(letters):
+    number = 0
+    for ch in letters:
+        number = number * 26 + ord(ch) - 64
+    return number
+
+
+def parse_range(a1):
+    """A1 range -> (first_row, first_col, last_row, last_col), None = open end."""
+    match = A1_RANGE.match(str(a1).strip().replace("'", "").upper())
+    if not match:
+        raise ValueError(f"unsupported range {a1!r}")
+    c1, r1, c2, r2 = match.groups()
+    if c2 is None and r2 is None:  # a single cell, row or column
+        c2, r2 = c1, r1
+    return (int(r1) if r1 else 1, column_number(c1) if c1 else 1,
+            int(r2) if r2 else None, column_number(c2) if c2 else None)
+
+
+def cell_text(value):
+    return "" if value is None else str(value)
+
+
+# ---------- STORE ----------
+class MirrorStore:
+    """The SQLite replica: one row per sheet row, keyed by (sheet, row)."""
+
+    def __init__(self, path=MIRROR_PATH):
+        self.path = path
+        self.local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    # ---------- FRESHNESS ----------
+    def meta(self, sheet):
+        row = self._connect().execute(
+            "SELECT rows, width, synced_at, stale_since FROM sheets WHERE sheet = ?", (sheet,)).fetchone()
+        return dict(zip(["rows", "width", "synced_at", "stale_since"], row)) if row else None
+
+    def lag(self, sheet):
+        """Seconds since the mirrored copy of `sheet` was read, or None if never synced."""
+        meta = self.meta(sheet)
+        if not meta or not meta["synced_at"]:
+            return None
+        return time.time() - meta["synced_at"]
+
+    def fresh(self, sheet):
+        meta = self.meta(sheet)
+        return bool(meta and not meta["stale_since"] and time.time() - meta["synced_at"] <= MAX_LAG)
+
+    def status(self):
+        return [{"sheet": sheet, "rows": rows, "lag_seconds": round(time.time() - synced_at, 1) if synced_at else None,
+                 "stale": bool(stale_since)}
+                for sheet, rows, synced_at, stale_since in self._connect().execute(
+                    "SELECT sheet, rows, synced_at, stale_since FROM sheets ORDER BY sheet")]
+
+    # ---------- READS ----------
+    def rows(self, sheet, first=1, last=None):
+        """[(row number, [values])] for rows first..last (inclusive)."""
+        last = last if last is not None else 2 ** 31
+        return [(row, json.loads(data)) for row, data in self._connect().execute(
+            "SELECT row, data FROM cells WHERE sheet = ? AND row BETWEEN ? AND ? ORDER BY row",
+            (sheet, first, last))]
+
+    # ---------- SYNC ----------
+    def apply_snapshot(self, sheet, values, fetched_at):
+        """
+        Replace the mirror of `sheet` with a get_values() result read at
+        `fetched_at`. Rows the app wrote after that moment are kept as they are,
+        since the snapshot may predate them. Returns the number of changed rows.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR IGNORE INTO sheets (sheet) VALUES (?)", (sheet,))
+            existing = {row: (data, written_at) for row, data, written_at in conn.execute(
+                "SELECT row, data, written_at FROM cells WHERE sheet = ?", (sheet,))}
+            changed = []
+            for row, cells in enumerate(values, start=1):
+                data = json.dumps(cells, ensure_ascii=False)
+                old_data, written_at = existing.get(row, (None, 0))
+                if old_data != data and written_at < fetched_at:
+                    changed.append((sheet, row, data))
+            conn.executemany("INSERT OR REPLACE INTO cells (sheet, row, data) VALUES (?, ?, ?)", changed)
+            removed = conn.execute("DELETE FROM cells WHERE sheet = ? AND row > ? AND written_at < ?",
+                                   (sheet, len(values), fetched_at)).rowcount
+            (last,) = conn.execute("SELECT MAX(row) FROM cells WHERE sheet = ?", (sheet,)).fetchone()
+            conn.execute("UPDATE sheets SET rows = ?, width = ?, synced_at = ?, "
+                         "stale_since = CASE WHEN stale_since < ? THEN 0 ELSE stale_since END WHERE sheet = ?",
+                         (last or 0, max((len(v) for v in values), default=0), fetched_at, fetched_at, sheet))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(changed) + removed
+
+    # ---------- WRITE-THROUGH ----------
+    def write(self, sheet, cells=(), rows=(), stale=False):
+        """
+        Apply an app write that already reached the sheet.
+        `cells` is [(row, col, value)], `rows` is [(row, [values])].
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            meta = conn.execute("SELECT rows, width FROM sheets WHERE sheet = ?", (sheet,)).fetchone()
+            if meta is None:
+                conn.execute("ROLLBACK")
+                return
+            last, width = meta
+            now = time.time()
+            for row, values in rows:
+                values = [cell_text(v) for v in values]
+                conn.execute("INSERT OR REPLACE INTO cells (sheet, row, data, written_at) VALUES (?, ?, ?, ?)",
+                             (sheet, row, json.dumps(values + [""] * (width - len(values)), ensure_ascii=False),
+                              now))
+                last = max(last, row)
+            for row, col, value in cells:
+                found = conn.execute("SELECT data FROM cells WHERE sheet = ? AND row = ?", (sheet, row)).fetchone()
+                values = json.loads(found[0]) if found else []
+                values += [""] * (max(col, width) - len(values))
+                values[col - 1] = cell_text(value)
+                conn.execute("INSERT OR REPLACE INTO cells (sheet, row, data, written_at) VALUES (?, ?, ?, ?)",
+                             (sheet, row, json.dumps(values, ensure_ascii=False), now))
+                last = max(last, row)
+            if stale:
+                conn.execute("UPDATE sheets SET stale_since = ? WHERE sheet = ?", (now, sheet))
+            conn.execute("UPDATE sheets SET rows = ? WHERE sheet = ?", (last, sheet))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+_store = []
+_store_checked_at = [0.0]
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    The process's MirrorStore, or None while no mirror file exists. A missing
+    file is looked for again every STORE_CHECK_INTERVAL seconds.
+    """
+    with _store_lock:
+        if not _store:
+            if time.time() - _store_checked_at[0] < STORE_CHECK_INTERVAL:
+                return None
+            _store_checked_at[0] = time.time()
+            if not os.path.exists(MIRROR_PATH):
+                return None
+            _store.append(MirrorStore(MIRROR_PATH))
+        return _store[0]
+
+
+# ---------- MIRRORED WORKSHEET ----------
+class MirroredWorksheet:
+    """
+    A gspread Worksheet whose reads come from the mirror while it is fresh.
+    Anything not handled here is passed to the live worksheet.
+    """
+
+    def __init__(self, worksheet):
+        self.live = worksheet
+        self.name = worksheet.title
+
+    def __getattr__(self, name):
+        return getattr(self.live, name)
+
+    @property
+    def store(self):
+        return get_store()
+
+    def _use_mirror(self):
+        try:
+            if self.store and self.store.fresh(self.name):
+                metrics.incr("mirror.reads")
+                return True
+        except sqlite3.Error:
+            metrics.incr("mirror.errors")
+        metrics.incr("mirror.fallbacks")
+        return False
+
+    def _mirror_write(self, **changes):
+        store = self.store
+        if store is None:
+            return
+        try:
+            store.write(self.name, **changes)
+        except sqlite3.Error:
+            metrics.incr("mirror.errors")
+
+    # ---------- READS ----------
+    def _range_values(self, range_name=None):
+        first_row, first_col, last_row, last_col = parse_range(range_name) if range_name else (1, 1, None, None)
+        rows = self.store.rows(self.name, first_row, last_row)
+        values = []
+        for _, cells in rows:
+            cells = cells[first_col - 1:last_col]
+            if last_col is not None:
+                cells += [""] * (last_col - first_col + 1 - len(cells))
+            values.append(cells)
+        while values and not any(values[-1]):
+            values.pop()  # the API does not return trailing blank rows
+        return values
+
+    def get_values(self, range_name=None, **kwargs):
+        if kwargs or not self._use_mirror():
+            return self.live.get_values(range_name, **kwargs) if range_name else self.live.get_values(**kwargs)
+        try:
+            return self._range_values(range_name)
+        except ValueError:
+            return self.live.get_values(range_name)
+
+    def batch_get(self, ranges, **kwargs):
+        if kwargs or not self._use_mirror():
+            return self.live.batch_get(ranges, **kwargs)
+        try:
+            return [self._range_values(r) for r in ranges]
+        except ValueError:
+            return self.live.batch_get(ranges)
+
+    def col_values(self, col, **kwargs):
+        if kwargs or not self._use_mirror():
+            return self.live.col_values(col, **kwargs)
+        values = [cells[col - 1] if len(cells) >= col else "" for _, cells in self.store.rows(self.name)]
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def get_all_records(self, **kwargs):
+        if kwargs or not self._use_mirror():
+            return self.live.get_all_records(**kwargs)
+        values = [cells for _, cells in self.store.rows(self.name)]
+        if not values:
+            return []
+        header = values[0]
+        return [dict(zip(header, numericise_all(row + [""] * (len(header) - len(row)))))
+                for row in values[1:]]
+
+    # ---------- WRITES ----------
+    def _first_appended_row(self, response):
+        """First row an append landed on, from the API response if possible."""
+        try:
+            return parse_range(response["updates"]["updatedRange"])[0]
+        except (KeyError, TypeError, ValueError):
+            store = self.store
+            meta = store.meta(self.name) if store else None
+            return (meta["rows"] if meta else 0) + 1
+
+    def append_row(self, values, **kwargs):
+        response = self.live.append_row(values, **kwargs)
+        self._mirror_write(rows=[(self._first_appended_row(response), values)])
+        return response
+
+    def append_rows(self, values, **kwargs):
+        response = self.live.append_rows(values, **kwargs)
+        first = self._first_appended_row(response)
+        self._mirror_write(rows=[(first + i, row) for i, row in enumerate(values)])
+        return response
+
+    def update_cell(self, row, col, value):
+        response = self.live.update_cell(row, col, value)
+        self._mirror_write(cells=[(row, col, value)])
+        return response
+
+    def _range_cells(self, range_name, values):
+        first_row, first_col, _, _ = parse_range(range_name)
+        return [(first_row + i, first_col + j, value)
+                for i, row in enumerate(values) for j, value in enumerate(row)]
+
+    def update(self, *args, **kwargs):
+        response = self.live.update(*args, **kwargs)
+        # Both update(range, values) and update(values, range) are in use
+        range_name = next((a for a in args if isinstance(a, str)), kwargs.get("range_name"))
+        values = next((a for a in args if isinstance(a, list)), kwargs.get("values"))
+        try:
+            self._mirror_write(cells=self._range_cells(range_name, values))
+        except (ValueError, TypeError):
+            self._mirror_write(stale=True)
+        return response
+
+    def batch_update(self, data, **kwargs):
+        response = self.live.batch_update(data, **kwargs)
+        try:
+            self._mirror_write(cells=[cell for item in data
+                                      for cell in self._range_cells(item["range"], item["values"])])
+        except (ValueError, TypeError, KeyError):
+            self._mirror_write(stale=True)
+        return response
+
+    def delete_rows(self, start_index, end_index=None):
+        response = self.live.delete_rows(start_index, end_index)
+        self._mirror_write(stale=True)  # rows shift; wait for the next full sync
+        return response
+
+
+def live(worksheet):
+    """The worksheet itself, for reads that must not be served from the mirror."""
+    return worksheet.live if isinstance(worksheet, MirroredWorksheet) else worksheet
+
+
+def mirrored(worksheet):
+    """Wrap a worksheet so reads come from the local mirror whenever one is running."""
+    if worksheet is None or isinstance(worksheet, MirroredWorksheet) or worksheet.title not in MIRRORED_SHEETS:
+        return worksheet
+    return MirroredWorksheet(worksheet)
+
+
+def replication_lag():
+    """{sheet: seconds behind the live sheet (None if never synced)} for dashboards."""
+    store = get_store()
+    if store is None:
+        return {}
+    return {s["sheet"]: s["lag_seconds"] for s in store.status()}
+
+
+# ---------- SYNC PROCESS ----------
+def sync_sheet(store, worksheet):
+    """Copy one worksheet into the mirror. Returns the number of changed rows."""
+    fetched_at = time.time()
+    values = worksheet.get_values()
+    changed = store.apply_snapshot(worksheet.title, values, fetched_at)
+    if changed:
+        shared_cache.notify(worksheet.title)
+    return changed
+
+
+def run(sheets, once=False):
+    store = MirrorStore(MIRROR_PATH)
+    worksheets = {}
+    while True:
+        started = time.time()
+        for name in sheets:
+            try:
+                if name not in worksheets:
+                    worksheets[name] = archive.connect_worksheet(name)
+                if worksheets[name] is None:
+                    del worksheets[name]
+                    continue
+                changed = sync_sheet(store, worksheets[name])
+                print(f"{name}: {changed} row(s) changed, lag {store.lag(name) or 0:.1f}s", flush=True)
+            except Exception as e:
+                worksheets.pop(name, None)
+                print(f"{name}: sync failed: {e}", flush=True)
+        if once:
+            return
+        time.sleep(max(0.0, SYNC_INTERVAL - (time.time() - started)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mirror the app's worksheets into a local SQLite replica")
+    parser.add_argument("--sheet", action="append", choices=MIRRORED_SHEETS,
+                        help="worksheet to mirror (repeatable, default: all)")
+    parser.add_argument("--once", action="store_true", help="run one sync pass and exit")
+    parser.add_argument("--status", action="store_true", help="print replication lag and exit")
+    args = parser.parse_args()
+
+    if args.status:
+        for s in MirrorStore(MIRROR_PATH).status():
+            lag = "never synced" if s["lag_seconds"] is None else f"lag {s['lag_seconds']}s"
+            print(f"{s['sheet']}: {s['rows']} row(s), {lag}{', stale' if s['stale'] else ''}")
+        return
+    run(args.sheet or MIRRORED_SHEETS, once=args.once)
+
+
+if __name__ == "__main__":
+    main()
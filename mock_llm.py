@@ -0,0 +1,223 @@
+# mock_llm.py
+"""
+Local OpenAI-compatible mock of the Groq chat completions API.
+
+Run it and point the app at it:
+
+    python mock_llm.py --port 8765 --model llama-3.1-70b-versatile:latency=1.5,fail=0.1
+    GROQ_API_URL=http://127.0.0.1:8765/v1/chat/completions GROQ_API_KEY=test streamlit run main.py
+
+Per-model behaviour:
+    latency    seconds before the first byte (default 0.2)
+    jitter     random extra latency, 0..jitter seconds (default 0.05)
+    fail       probability of a 500 response (default 0)
+    ratelimit  probability of a 429 response with Retry-After (default 0)
+    tps        streamed tokens per second (default 200)
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ------------------- SETTINGS -------------------
+DEFAULT_BEHAVIOUR = {"latency": 0.2, "jitter": 0.05, "fail": 0.0, "ratelimit": 0.0, "tps": 200.0}
+DEFAULT_MODELS = ["llama-3.1-70b-versatile", "llama-3.1-8b-instant"]
+
+
+def parse_model_spec(spec):
+    """Parse "name:latency=1,fail=0.1" into (name, behaviour dict)."""
+    name, _, options = spec.partition(":")
+    behaviour = dict(DEFAULT_BEHAVIOUR)
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        if key.strip() not in DEFAULT_BEHAVIOUR:
+            raise ValueError(f"Unknown model option: {key}")
+        behaviour[key.strip()] = float(value)
+    return name.strip(), behaviour
+
+
+# ------------------- CANNED ANSWERS -------------------
+def mock_answer(model, messages):
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    question = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    if "topic" in system.lower():
+        asked = next((line[2:] for line in question.splitlines() if line.startswith("Q:")), question)
+        return " ".join(asked.split()[:4]).title() or "Mock Topic"
+    return f"[{model}] Mock advice for: {question[:120]}"
+
+
+# ------------------- HTTP HANDLER -------------------
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, status, payload, extra_headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            models = [{"id": name, "object": "model"} for name in self.server.models]
+            self._send_json(200, {"object": "list", "data": models})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON"}})
+            return
+
+        model = request.get("model", "")
+        behaviour = self.server.behaviour_for(model)
+        if behaviour is None:
+            self._send_json(404, {"error": {"message": f"The model `{model}` does not exist"}})
+            return
+
+        self.server.count(model, "requests")
+        time.sleep(behaviour["latency"] + random.uniform(0, behaviour["jitter"]))
+
+        roll = random.random()
+        if roll < behaviour["ratelimit"]:
+            self.server.count(model, "rate_limited")
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                            {"Retry-After": "1"})
+            return
+        if roll < behaviour["ratelimit"] + behaviour["fail"]:
+            self.server.count(model, "failed")
+            self._send_json(500, {"error": {"message": "Mock upstream failure"}})
+            return
+
+        content = mock_answer(model, request.get("messages", []))
+        if request.get("stream"):
+            self._stream(model, content, behaviour)
+        else:
+            self._send_json(200, completion(model, content, request.get("messages", [])))
+
+    def _stream(self, model, content, behaviour):
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        delay = 1.0 / behaviour["tps"] if behaviour["tps"] > 0 else 0
+        tokens = content.split(" ")
+        for i, token in enumerate(tokens):
+            delta = {"content": token if i == 0 else " " + token}
+            if i == 0:
+                delta["role"] = "assistant"
+            self._event({"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            time.sleep(delay)
+        self._event({"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def _event(self, payload):
+        self.wfile.write(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+        self.wfile.flush()
+
+
+def completion(model, content, messages):
+    prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+    completion_tokens = len(content.split())
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+# ------------------- SERVER -------------------
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, models, allow_unknown=True, verbose=False):
+        super().__init__(address, MockHandler)
+        self.models = models
+        self.allow_unknown = allow_unknown
+        self.verbose = verbose
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def behaviour_for(self, model):
+        if model in self.models:
+            return self.models[model]
+        return dict(DEFAULT_BEHAVIOUR) if self.allow_unknown else None
+
+    def count(self, model, field):
+        with self.stats_lock:
+            model_stats = self.stats.setdefault(model, {})
+            model_stats[field] = model_stats.get(field, 0) + 1
+
+
+def start_server(models=None, host="127.0.0.1", port=0, allow_unknown=True, verbose=False):
+    """Start the mock server on a background thread and return it."""
+    if models is None:
+        models = {name: dict(DEFAULT_BEHAVIOUR) for name in DEFAULT_MODELS}
+    server = MockLLMServer((host, port), models, allow_unknown, verbose)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Groq chat completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", action="append", default=[],
+                        help="name:latency=..,jitter=..,fail=..,ratelimit=..,tps=.. (repeatable)")
+    parser.add_argument("--strict", action="store_true", help="return 404 for models not configured")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    models = dict(parse_model_spec(spec) for spec in args.model)
+    for name in DEFAULT_MODELS:
+        models.setdefault(name, dict(DEFAULT_BEHAVIOUR))
+
+    server = MockLLMServer((args.host, args.port), models, not args.strict, args.verbose)
+    print(f"Mock LLM listening on {server.url}")
+    for name, behaviour in models.items():
+        print(f"  {name}: {behaviour}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
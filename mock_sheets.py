@@ -0,0 +1,303 @@
+# mock_sheets.py
+"""
+In-memory stand-in for the "User" Google Sheets workbook.
+
+The server keeps every worksheet in memory and answers the subset of the
+gspread Worksheet API the app uses; RemoteWorksheet forwards those calls to
+it over HTTP, so several processes (load-test sessions, app replicas) share
+one workbook. install() patches gspread so the app's connect helpers get
+RemoteWorksheets instead of real sheets:
+
+    python mock_sheets.py --port 8766 --latency 0.3     # ~ Sheets round-trip time
+
+GET /stats returns the number of calls per "sheet.method".
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from gspread.utils import numericise_all
+
+from mirror import cell_text, parse_range
+
+# ------------------- SETTINGS -------------------
+WORKBOOK_HEADERS = {
+    "Sheet1": ["username", "password", "name", "email", "phone", "address", "dob"],
+    "Sheet3": ["id", "user", "text", "likes", "time"],
+    "Sheet4": ["msg_id", "user", "text", "time"],
+    "Sheet5": ["Farmer Name", "Crop Name", "Quantity (kg)", "Price (₹/kg)", "Location", "Phone", "Email",
+               "Listing ID", "Version", "Posted At"],
+    "Sheet6": ["Order ID", "Crop Name", "Quantity", "Price", "Buyer Name", "Buyer Email", "Farmer Name",
+               "Status", "Courier Company", "Tracking Number", "Expected Delivery", "Delivery Option"],
+    "ai data": ["username", "timestamp", "topic", "question", "answer"],
+}
+
+
+# ------------------- WORKSHEET -------------------
+class MemoryWorksheet:
+    """One worksheet as a list of rows of strings, like FORMATTED_VALUE reads."""
+
+    def __init__(self, title, header, rows=()):
+        self.title = title
+        self.lock = threading.Lock()
+        self.values = [[cell_text(v) for v in header]] + [[cell_text(v) for v in row] for row in rows]
+
+    def _slice(self, range_name):
+        first_row, first_col, last_row, last_col = parse_range(range_name) if range_name else (1, 1, None, None)
+        rows = self.values[first_row - 1:last_row]
+        rows = [row[first_col - 1:last_col] for row in rows]
+        while rows and not any(rows[-1]):
+            rows.pop()
+        width = (last_col - first_col + 1) if last_col else max((len(r) for r in rows), default=0)
+        return [row + [""] * (width - len(row)) for row in rows]
+
+    def _set(self, row, col, value):
+        while len(self.values) < row:
+            self.values.append([])
+        cells = self.values[row - 1]
+        cells += [""] * (col - len(cells))
+        cells[col - 1] = cell_text(value)
+
+    # ---------- READS ----------
+    def get_values(self, range_name=None, **kwargs):
+        with self.lock:
+            return self._slice(range_name)
+
+    get = get_values
+
+    def batch_get(self, ranges, **kwargs):
+        with self.lock:
+            return [self._slice(r) for r in ranges]
+
+    def col_values(self, col, **kwargs):
+        with self.lock:
+            values = [row[col - 1] if len(row) >= col else "" for row in self.values]
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def row_values(self, row, **kwargs):
+        with self.lock:
+            return list(self.values[row - 1]) if row <= len(self.values) else []
+
+    def get_all_records(self, **kwargs):
+        with self.lock:
+            header, rows = list(self.values[0]), [list(r) for r in self.values[1:]]
+        # Like gspread: the header is padded to the widest row and must not repeat
+        width = max([len(header)] + [len(row) - next((i for i, v in enumerate(reversed(row)) if v != ""), len(row))
+                                     for row in rows])
+        header += [""] * (width - len(header))
+        duplicates = sorted({h for h in header if header.count(h) > 1})
+        if duplicates and not kwargs.get("expected_headers"):
+            raise ValueError(f"the header row in the worksheet contains duplicates: {duplicates}")
+        return [dict(zip(header, numericise_all(row + [""] * (len(header) - len(row))))) for row in rows]
+
+    # ---------- WRITES ----------
+    def append_rows(self, values, **kwargs):
+        with self.lock:
+            first = len(self.values) + 1
+            self.values.extend([cell_text(v) for v in row] for row in values)
+            last = len(self.values)
+        return {"updates": {"updatedRange": f"'{self.title}'!A{first}:Z{last}", "updatedRows": len(values)}}
+
+    def append_row(self, values, **kwargs):
+        return self.append_rows([values], **kwargs)
+
+    def update_cell(self, row, col, value):
+        with self.lock:
+            self._set(row, col, value)
+        return {}
+
+    def _update_range(self, range_name, values):
+        first_row, first_col, _, _ = parse_range(range_name)
+        for i, row in enumerate(values):
+            for j, value in enumerate(row):
+                self._set(first_row + i, first_col + j, value)
+
+    def update(self, *args, **kwargs):
+        range_name = next((a for a in args if isinstance(a, str)), kwargs.get("range_name"))
+        values = next((a for a in args if isinstance(a, list)), kwargs.get("values"))
+        with self.lock:
+            self._update_range(range_name or "A1", values)
+        return {}
+
+    def batch_update(self, data, **kwargs):
+        with self.lock:
+            for item in data:
+                self._update_range(item["range"], item["values"])
+        return {}
+
+    def delete_rows(self, start_index, end_index=None):
+        with self.lock:
+            del self.values[start_index - 1:(end_index or start_index)]
+        return {}
+
+
+# ------------------- SERVER -------------------
+class SheetsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.server.snapshot_stats())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/call":
+            self._send_json(404, {"error": "Not found"})
+            return
+        call = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        sheet = self.server.sheets.get(call.get("sheet"))
+        method = call.get("method", "")
+        if sheet is None or method.startswith("_") or not hasattr(sheet, method):
+            self._send_json(404, {"error": f"WorksheetNotFound: {call.get('sheet')}.{method}"})
+            return
+        self.server.count(f"{sheet.title}.{method}")
+        time.sleep(self.server.latency + random.uniform(0, self.server.jitter))
+        try:
+            result = getattr(sheet, method)(*call.get("args", []), **call.get("kwargs", {}))
+        except Exception as e:
+            self._send_json(400, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self._send_json(200, {"result": result})
+
+
+class MockSheetsServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, sheets, latency=0.0, jitter=0.0, verbose=False):
+        super().__init__(address, SheetsHandler)
+        self.sheets = sheets
+        self.latency = latency
+        self.jitter = jitter
+        self.verbose = verbose
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key):
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def snapshot_stats(self):
+        with self.stats_lock:
+            return dict(self.stats)
+
+
+def empty_workbook():
+    return {name: MemoryWorksheet(name, header) for name, header in WORKBOOK_HEADERS.items()}
+
+
+def start_server(sheets=None, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, verbose=False):
+    """Start the mock workbook on a background thread and return the server."""
+    server = MockSheetsServer((host, port), sheets or empty_workbook(), latency, jitter, verbose)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ------------------- CLIENT -------------------
+class RemoteWorksheet:
+    """A worksheet living in a MockSheetsServer; any method call is forwarded."""
+
+    _local = threading.local()
+
+    def __init__(self, url, title):
+        self.url = url
+        self.title = title
+        self.calls = 0
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        def call(*args, **kwargs):
+            self.calls += 1
+            response = self._session().post(f"{self.url}/call", json={
+                "sheet": self.title, "method": method, "args": list(args), "kwargs": kwargs})
+            payload = response.json()
+            if response.status_code != 200:
+                raise RuntimeError(payload.get("error"))
+            return payload["result"]
+        return call
+
+
+class MockWorkbook:
+    def __init__(self, url):
+        self.url = url
+
+    def worksheet(self, title):
+        if title not in WORKBOOK_HEADERS:
+            raise RuntimeError(f"WorksheetNotFound: {title}")
+        return RemoteWorksheet(self.url, title)
+
+
+class MockClient:
+    def __init__(self, url):
+        self.url = url
+
+    def open(self, name):
+        return MockWorkbook(self.url)
+
+
+def install(url):
+    """Route gspread connections in this process to the mock workbook at `url`."""
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    ServiceAccountCredentials.from_json_keyfile_dict = classmethod(lambda cls, keyfile, scopes=None, **kw: None)
+    gspread.authorize = lambda credentials, *args, **kwargs: MockClient(url)
+
+
+def stats(url):
+    return requests.get(f"{url}/stats").json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory stand-in for the app's Google Sheets workbook")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency, 0..jitter seconds")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = MockSheetsServer((args.host, args.port), empty_workbook(), args.latency, args.jitter, args.verbose)
+    print(f"Mock workbook listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# model_router.py
+import threading
+import time
+from collections import deque
+
+import metrics
+
+# ------------------- SETTINGS -------------------
+# Higher tier = better answers for long advisory questions
+MODEL_TIERS = {
+    "llama-3.1-70b-versatile": 2,
+    "llama-3.1-8b-instant": 1,
+}
+# Latency assumed for a model before it has answered anything (seconds)
+PRIOR_LATENCY = {
+    "llama-3.1-70b-versatile": 3.0,
+    "llama-3.1-8b-instant": 1.0,
+}
+MIN_TIER = {"short": 1, "advisory": 2}
+WINDOW = 50  # recent calls kept per model
+
+ADVISORY_WORDS = {
+    "plan", "schedule", "recommend", "advise", "advice", "strategy", "compare",
+    "explain", "why", "improve", "best", "should", "suggest", "steps"
+}
+
+
+def classify(question, history):
+    """Return "short" for brief factual questions, "advisory" otherwise."""
+    words = [w.strip("?.,!").lower() for w in str(question).split()]
+    if len(words) > 25 or len(history) >= 4:
+        return "advisory"
+    if len(words) <= 12 and not ADVISORY_WORDS.intersection(words):
+        return "short"
+    return "advisory"
+
+
+# ------------------- TELEMETRY -------------------
+class ModelStats:
+    """Rolling latency, error rate and token throughput for one model."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = deque(maxlen=WINDOW)  # (latency, ok, completion_tokens)
+
+    def record(self, latency, ok, tokens=0):
+        self.calls.append((latency, ok, tokens))
+
+    def latency(self):
+        good = sorted(c[0] for c in self.calls if c[1])
+        if not good:
+            return PRIOR_LATENCY.get(self.name, 2.0)
+        return good[len(good) // 2]
+
+    def error_rate(self):
+        if not self.calls:
+            return 0.0
+        return sum(1 for c in self.calls if not c[1]) / len(self.calls)
+
+    def tokens_per_second(self):
+        busy = sum(c[0] for c in self.calls if c[1])
+        tokens = sum(c[2] for c in self.calls if c[1])
+        return tokens / busy if busy else 0.0
+
+    def expected_latency(self):
+        """Median latency inflated by the chance of having to fall back."""
+        return self.latency() / max(1.0 - self.error_rate(), 0.05)
+
+    def summary(self):
+        return {
+            "calls": len(self.calls),
+            "p50_latency": round(self.latency(), 3),
+            "error_rate": round(self.error_rate(), 3),
+            "tokens_per_second": round(self.tokens_per_second(), 1),
+        }
+
+
+# ------------------- ROUTER -------------------
+class ModelRouter:
+    def __init__(self, models):
+        self.lock = threading.Lock()
+        self.stats = {name: ModelStats(name) for name in models}
+
+    def choose(self, question, history):
+        """Order models so the fastest one meeting the quality floor goes first."""
+        start = time.perf_counter()
+        kind = classify(question, history)
+        with self.lock:
+            expected = {name: s.expected_latency() for name, s in self.stats.items()}
+        floor = MIN_TIER[kind]
+        eligible = sorted((m for m in expected if MODEL_TIERS.get(m, 1) >= floor), key=expected.get)
+        fallback = sorted((m for m in expected if m not in eligible), key=expected.get)
+        order = eligible + fallback
+
+        metrics.incr(f"ai.route.{kind}.{order[0]}")
+        metrics.observe("ai.route.decide", time.perf_counter() - start)
+        return order
+
+    def record(self, model, latency, ok, tokens=0):
+        with self.lock:
+            self.stats[model].record(latency, ok, tokens)
+        metrics.observe(f"ai.model.{model}.latency", latency)
+        metrics.incr(f"ai.model.{model}.{'ok' if ok else 'errors'}")
+
+    def summary(self):
+        with self.lock:
+            return {name: s.summary() for name, s in self.stats.items()}
+
+
+router = ModelRouter(list(MODEL_TIERS))
@@ -0,0 +1,266 @@
+# orders.py
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+
+import shared_cache
+from mirror import live
+
+# ---------------- SETTINGS ----------------
+ORDERS_TTL = 15  # seconds an orders snapshot is reused across reruns
+STATUS_COLUMN = 8  # "Status" is the 8th column of Sheet6
+TOPIC = "Sheet6"  # shared-cache topic announced on every order change
+
+# Sheet5 listing columns used for stock reservation
+LISTING_QTY_COLUMN = "C"
+LISTING_ID_COLUMN = "H"
+LISTING_VERSION_COLUMN = "I"
+
+# Sheet6 columns M:N added for stock tracking; older sheets only have A:L headers
+TRACKING_HEADERS_RANGE = "M1:N1"
+TRACKING_HEADERS = ["Listing ID", "Listing Row"]
+
+
+# ---------------- ORDERS SNAPSHOT ----------------
+class OrdersSnapshot:
+    """All orders from Sheet6 with lookups by id, farmer, buyer and status."""
+
+    def __init__(self, records):
+        self.orders = []
+        self.by_id = {}
+        self.by_farmer = {}
+        self.by_buyer = {}
+        self.by_status = {}
+        self.by_farmer_status = {}
+        for row_no, record in enumerate(records, start=2):  # row 1 is the header
+            order = {str(k).strip(): v for k, v in record.items()}
+            order["_row"] = row_no
+            self.orders.append(order)
+            status = str(order.get("Status", "")).strip()
+            farmer = order.get("Farmer Name")
+            self.by_id[str(order.get("Order ID"))] = order
+            self.by_farmer.setdefault(farmer, []).append(order)
+            self.by_buyer.setdefault(order.get("Buyer Name"), []).append(order)
+            self.by_status.setdefault(status, []).append(order)
+            self.by_farmer_status.setdefault((farmer, status), []).append(order)
+
+    def for_farmer(self, farmer, status=None):
+        if status is None:
+            return self.by_farmer.get(farmer, [])
+        return self.by_farmer_status.get((farmer, status), [])
+
+    def for_buyer(self, buyer):
+        return self.by_buyer.get(buyer, [])
+
+    def pending_for_farmer(self, farmer):
+        return self.for_farmer(farmer, "Pending")
+
+    def get(self, order_id):
+        return self.by_id.get(str(order_id))
+
+
+_headers_checked = []
+_headers_guard = threading.Lock()
+
+
+def ensure_tracking_headers(sheet):
+    """
+    Give Sheet6 headers for the Listing ID / Listing Row columns (once per
+    process). Without them get_all_records sees blank, duplicate headers
+    and fails as soon as an order with those values exists.
+    """
+    with _headers_guard:
+        if _headers_checked:
+            return
+        current = live(sheet).get_values(TRACKING_HEADERS_RANGE)
+        if [str(v).strip() for v in (current[0] if current else [])] != TRACKING_HEADERS:
+            sheet.update(TRACKING_HEADERS_RANGE, [TRACKING_HEADERS])
+            shared_cache.notify(TOPIC)
+        _headers_checked.append(True)
+
+
+@st.cache_resource(ttl=ORDERS_TTL, show_spinner=False)
+def read_orders(_sheet, version=0):
+    ensure_tracking_headers(_sheet)
+    return OrdersSnapshot(shared_cache.sheet_records(_sheet, TOPIC))
+
+
+def load_orders(sheet):
+    """Orders snapshot shared by the alert banner, alert page and My Orders."""
+    return read_orders(sheet, shared_cache.topic_version(TOPIC))
+
+
+def orders_changed():
+    """Drop the cached snapshot here and in the other replicas."""
+    shared_cache.notify(TOPIC)
+    read_orders.clear()
+
+
+def set_status(sheet, order, status):
+    """Update an order's status in place and drop the cached snapshot."""
+    sheet.update_cell(order["_row"], STATUS_COLUMN, status)
+    orders_changed()
+
+
+def still_pending(sheet, order):
+    """Re-read the order's row from the live sheet: does it still hold this order, pending?"""
+    row = order["_row"]
+    values = live(sheet).get_values(f"A{row}:H{row}")
+    values = (values[0] if values else []) + [""] * STATUS_COLUMN
+    return (str(values[0]).strip() == str(order.get("Order ID", "")).strip()
+            and str(values[STATUS_COLUMN - 1]).strip() in ("", "Pending"))
+
+
+def order_recorded(sheet, order_id):
+    """True if an order row with `order_id` is in the live sheet."""
+    return str(order_id) in (str(v).strip() for v in live(sheet).col_values(1))
+
+
+# ---------------- STOCK RESERVATION ----------------
+_listing_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _thread_lock(listing_row):
+    with _locks_guard:
+        return _listing_locks.setdefault(listing_row, threading.Lock())
+
+
+@contextmanager
+def listing_lock(listing_row):
+    """
+    Orders against one listing row run one at a time: a thread lock inside
+    this process plus a shared_cache lease across the replicas on this host.
+    """
+    with _thread_lock(listing_row), shared_cache.exclusive(f"listing:{listing_row}"):
+        yield
+
+
+def order_lock(order):
+    """The lock an order's status changes run under: its listing's, or its own for untracked orders."""
+    listing_row = to_int(order.get("Listing Row"))
+    return listing_lock(listing_row if listing_row >= 2 else f"order:{order.get('Order ID')}")
+
+
+def to_int(value):
+    try:
+        return int(float(str(value).replace(",", "").strip() or 0))
+    except ValueError:
+        return 0
+
+
+def read_listing(market_sheet, listing_row):
+    """Read one listing row from the live sheet: (values, available kg, version)."""
+    values = live(market_sheet).get_values(f"A{listing_row}:{LISTING_VERSION_COLUMN}{listing_row}")
+    values = (values[0] if values else []) + [""] * 9
+    return values, to_int(values[2]), to_int(values[8])
+
+
+def same_listing(values, listing):
+    """Check the row still holds the listing the buyer selected."""
+    listing_id = str(listing.get("Listing ID", "")).strip()
+    if listing_id:
+        return str(values[7]).strip() == listing_id
+    return (values[0], values[1]) == (listing.get("Farmer Name"), listing.get("Crop Name"))
+
+
+def write_stock(market_sheet, listing_row, quantity, version):
+    market_sheet.batch_update([
+        {"range": f"{LISTING_QTY_COLUMN}{listing_row}", "values": [[quantity]]},
+        {"range": f"{LISTING_VERSION_COLUMN}{listing_row}", "values": [[version]]},
+    ])
+
+
+def place_order(market_sheet, orders_sheet, listing, quantity, buyer, buyer_email, delivery_option):
+    """
+    Reserve `quantity` kg of a listing and record the order.
+
+    The listing row is re-read while holding its lock (one row, not the
+    sheet), so the check and the decrement cannot interleave with another
+    order from any replica on this host. The order only goes through if the
+    row still holds the same listing with enough stock. The Version column
+    counts stock changes; it is informational, not compared.
+    Returns (ok, message, remaining_kg).
+    """
+    listing_row = listing["_row"]
+    ensure_tracking_headers(orders_sheet)
+    with listing_lock(listing_row):
+        values, available, version = read_listing(market_sheet, listing_row)
+        if not same_listing(values, listing):
+            return False, "This listing has changed. Please refresh the market.", None
+        if quantity > available:
+            return False, f"Only {available} kg left.", available
+
+        remaining = available - quantity
+        write_stock(market_sheet, listing_row, remaining, version + 1)
+        order_id = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        try:
+            orders_sheet.append_row([
+                order_id, listing.get("Crop Name"), quantity,
+                listing.get("Price (₹/kg)"), buyer, buyer_email,
+                listing.get("Farmer Name"), "Pending", "", "", "", delivery_option,
+                listing.get("Listing ID", ""), listing_row
+            ])
+        except Exception:
+            # A timeout or 5xx can arrive after the row was appended: only undo a reservation
+            # whose order is really missing, and keep it when that cannot be checked either
+            try:
+                recorded = order_recorded(orders_sheet, order_id)
+            except Exception:
+                raise RuntimeError(f"Order {order_id} may not have been recorded; its stock stays "
+                                   "reserved until the order is rejected.")
+            if not recorded:
+                write_stock(market_sheet, listing_row, available, version + 2)  # undo the reservation
+                raise
+    orders_changed()
+    return True, f"Order {order_id} placed for {quantity} kg.", remaining
+
+
+def release_stock(market_sheet, order):
+    """
+    Give a rejected order's quantity back to its listing; call with the
+    order's lock held. Returns the new stock or None.
+    """
+    listing_row = to_int(order.get("Listing Row"))
+    if listing_row < 2:
+        return None  # order placed before stock was tracked
+    values, available, version = read_listing(market_sheet, listing_row)
+    listing_id = str(order.get("Listing ID", "")).strip()
+    if listing_id and str(values[7]).strip() != listing_id:
+        return None  # the listing is gone
+    restored = available + to_int(order.get("Quantity"))
+    write_stock(market_sheet, listing_row, restored, version + 1)
+    return restored
+
+
+def accept_order(orders_sheet, order, status, details=None):
+    """
+    Mark a pending order accepted as `status`, writing `details`
+    ({column number: value}) too. Returns False if the order was already
+    accepted or rejected elsewhere.
+    """
+    with order_lock(order):
+        if not still_pending(orders_sheet, order):
+            return False
+        for column, value in (details or {}).items():
+            orders_sheet.update_cell(order["_row"], column, value)
+        set_status(orders_sheet, order, status)
+    return True
+
+
+def reject_order(orders_sheet, market_sheet, order):
+    """
+    Mark a pending order rejected and release its reserved stock.
+
+    The status is re-read from the live sheet under the order's lock, so a
+    second reject (another replica, a lagging snapshot) or a reject racing
+    an accept cannot give the stock back twice. Returns (rejected, new
+    stock or None); rejected is False if the order was already handled.
+    """
+    with order_lock(order):
+        if not still_pending(orders_sheet, order):
+            return False, None
+        set_status(orders_sheet, order, "Rejected")
+        return True, release_stock(market_sheet, order)
@@ -0,0 +1,92 @@
+# page_data.py
+"""
+Fetch a page's independent datasets concurrently.
+
+A page declares the data it needs up front as {name: callable}; fetch() runs
+every callable on its own thread and waits for them against one shared
+deadline, so the page waits for its slowest backend call rather than the
+sum of them all.
+
+Each thread carries the session's ScriptRunContext, so st.cache_data,
+st.secrets and st.warning behave as they do on the script thread. A dataset
+still running at the deadline is reported as timed out and left to finish
+in the background, which warms its cache for the next rerun; its context is
+detached first, so anything it draws is dropped instead of landing in a
+later rerun.
+"""
+import dataclasses
+import threading
+import time
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+import metrics
+
+# ---------- SETTINGS ----------
+PAGE_DEADLINE = 20.0  # seconds a page waits for all of its datasets
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class PageData(dict):
+    """Results by dataset name; failed or late datasets are in .errors instead."""
+
+    def __init__(self):
+        super().__init__()
+        self.errors = {}
+
+
+class DatasetThread(threading.Thread):
+    def __init__(self, dataset, fn):
+        super().__init__(name=f"page-data-{dataset}", daemon=True)
+        self.dataset = dataset
+        self.fn = fn
+        self.result = None
+        self.error = None
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            self.result = self.fn()
+        except Exception as e:
+            self.error = e
+        finally:
+            metrics.observe(f"data.{self.dataset}", time.perf_counter() - start)
+
+    def detach(self):
+        """Stop this thread from drawing into the session (st calls become no-ops)."""
+        setattr(self, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+
+
+def quiet_context(ctx):
+    """
+    A copy of `ctx` sharing its session state, caches and secrets but drawing
+    nothing, for work that outlives the script run that started it.
+    """
+    if ctx is None:
+        return None
+    return dataclasses.replace(ctx, _enqueue=lambda msg: None, cursors={})
+
+
+def fetch(datasets, deadline=PAGE_DEADLINE):
+    """Run {name: callable} concurrently and return a PageData of their results."""
+    threads = [add_script_run_ctx(DatasetThread(name, fn)) for name, fn in datasets.items()]
+    for thread in threads:
+        thread.start()
+
+    data = PageData()
+    end = time.monotonic() + deadline
+    for thread in threads:
+        thread.join(max(0.0, end - time.monotonic()))
+        if thread.is_alive():
+            thread.detach()
+            metrics.incr("data.deadline_exceeded")
+            data.errors[thread.dataset] = DeadlineExceeded(f"{thread.dataset} not loaded within {deadline:.0f}s")
+        elif thread.error is not None:
+            data.errors[thread.dataset] = thread.error
+        else:
+            data[thread.dataset] = thread.result
+    return data
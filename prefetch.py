@@ -0,0 +1,89 @@
+# prefetch.py
+"""
+Post-login warm-up.
+
+Right after a successful login the user lands on Profile, which needs none
+of the slow data. start() uses that time to load, on a background thread,
+what the next page will want: the user's chat topic index, the orders
+snapshot behind the pending-orders banner, and the first page of the
+message feed. Process-wide caches are warmed as a side effect; the
+per-session results wait in st.session_state.prefetch until the AI
+Assistant or Messenger page takes them. The warm-up runs with a quiet copy
+of the login run's context, so any warning it raises is dropped rather than
+drawn into whatever page the user is on by then.
+"""
+import threading
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+import metrics
+import page_data
+
+# ---------- SETTINGS ----------
+PREFETCH_DEADLINE = 60.0  # seconds before slow warm-ups are abandoned
+TAKE_WAIT = 10.0  # seconds a page waits for a running warm-up before loading itself
+
+
+class Prefetch:
+    """
+    Background warm-up for one logged-in user; results are handed out once.
+    `warm` tasks only fill process-wide caches and their results are dropped.
+    """
+
+    def __init__(self, username, tasks, warm=None):
+        self.username = username
+        self.results = {}
+        self.done = threading.Event()
+        self.thread = add_script_run_ctx(threading.Thread(
+            target=self._run, args=(tasks, warm or {}), name="prefetch", daemon=True),
+            page_data.quiet_context(get_script_run_ctx()))
+
+    def _run(self, tasks, warm):
+        with metrics.timer("prefetch.login"):
+            data = page_data.fetch({**warm, **tasks}, deadline=PREFETCH_DEADLINE)
+        self.results = {name: data[name] for name in tasks if name in data}
+        metrics.incr("prefetch.failed", len(data.errors))
+        self.done.set()
+
+    def take(self, name, username, timeout=0):
+        """
+        A finished result for `username`, or None (failed, already taken, or
+        not ready within `timeout` seconds).
+        """
+        if username != self.username:
+            return None
+        if timeout:
+            self.done.wait(timeout)
+        if not self.done.is_set():
+            return None
+        return self.results.pop(name, None)
+
+
+def start(user):
+    """Begin warming the pages a user is likely to open next."""
+    from ai_assistant import load_user_chats
+    from comments import sync_archive_generation
+    from market import open_orders
+    from message import load_feed
+
+    username = user.get("username", "")
+    sync_archive_generation()  # comment bookkeeping is only touched on script threads
+    prefetch = Prefetch(username, {
+        "chats": lambda: load_user_chats(username),
+        "feed": load_feed,
+    }, warm={"orders": open_orders})
+    st.session_state.prefetch = prefetch
+    prefetch.thread.start()
+
+
+def take(name, username, timeout=0):
+    """This session's warmed `name` for `username`, waiting up to `timeout` seconds for it."""
+    prefetch = st.session_state.get("prefetch")
+    return prefetch.take(name, username, timeout) if prefetch else None
+
+
+def warming(username):
+    """True while this session's warm-up for `username` is still running."""
+    prefetch = st.session_state.get("prefetch")
+    return bool(prefetch) and prefetch.username == username and not prefetch.done.is_set()
@@ -3,6 +3,7 @@ import json
 import gspread
 from datetime import date
 from oauth2client.service_account import ServiceAccountCredentials
+from mirror import mirrored
 
 # --------------------------------------------------------
 # 🌐 GOOGLE SHEET CONNECTION
@@ -19,7 +20,7 @@ def connect_google_sheet(sheet_name="Sheet1"):
         creds_dict = json.loads(creds_json)
         creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
         client = gspread.authorize(creds)
-        return client.open("User").worksheet(sheet_name)
+        return mirrored(client.open("User").worksheet(sheet_name))
     except Exception as e:
         st.warning(f"⚠️ Could not connect to Google Sheet: {e}")
         return None
@@ -134,8 +135,8 @@ def app():
         # Clear all relevant session data
         keys_to_clear = [
             "logged_in", "user", "page",
-            "ai_history", "ai_mode", "current_topic", "user_chats",
-            "selected_old_topic", "ai_selected_old_topic"
+            "ai_mode", "current_topic", "user_chats",
+            "selected_old_topic", "ai_selected_old_topic", "prefetch"
         ]
         for key in keys_to_clear:
             if key in st.session_state:
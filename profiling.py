@@ -0,0 +1,170 @@
+# profiling.py
+"""
+Opt-in per-rerun profiling of the routed page.
+
+Turn it on for every session with KISSAN_PROFILE=1, or for one session by
+opening the app with ?profile=<KISSAN_PROFILE_TOKEN>. Each profiled rerun
+writes three files to KISSAN_PROFILE_DIR (default "profiles/"):
+
+    <time>-<page>-<session>.folded     collapsed stacks, one "a;b;c count" per line
+                                       (flamegraph.pl / speedscope / inferno)
+    <time>-<page>-<session>.alloc.txt  top allocations made during the rerun
+    <time>-<page>-<session>.state.txt  bytes held by each session_state key
+
+Stacks come from a sampling thread, so the page runs at close to full
+speed. tracemalloc is process-wide: concurrent profiled sessions see each
+other's allocations.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+
+import metrics
+from storage import memory_report
+
+# ---------- SETTINGS ----------
+PROFILE_DIR = os.environ.get("KISSAN_PROFILE_DIR", "profiles")
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+TOP_ALLOCATIONS = 30
+TRACEMALLOC_FRAMES = 10
+
+
+def setting(name, default=None):
+    value = os.environ.get(name)
+    if value is None:
+        try:
+            value = st.secrets.get(name, default)
+        except Exception:
+            value = default
+    return value
+
+
+def enabled():
+    """Whether this session's reruns are profiled."""
+    if str(setting("KISSAN_PROFILE", "")).lower() in ("1", "true", "yes"):
+        return True
+    token = setting("KISSAN_PROFILE_TOKEN")
+    requested = st.query_params.get("profile")
+    if token and requested is not None:
+        st.session_state.profiling = requested == token
+    return st.session_state.get("profiling", False)
+
+
+# ---------- STACK SAMPLER ----------
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.done.set()
+        self.join()
+        return self.stacks
+
+
+# ---------- ALLOCATION TRACKING ----------
+_tracing_lock = threading.Lock()
+_tracing_users = [0]
+
+
+def start_tracing():
+    with _tracing_lock:
+        if _tracing_users[0] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        _tracing_users[0] += 1
+
+
+def stop_tracing():
+    with _tracing_lock:
+        _tracing_users[0] -= 1
+        if _tracing_users[0] == 0:
+            tracemalloc.stop()
+
+
+def format_allocations(before, after):
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    after = after.filter_traces(ignore)
+    lines = [f"{'size diff':>12} {'count diff':>10}  location"]
+    for stat in after.compare_to(before.filter_traces(ignore), "traceback")[:TOP_ALLOCATIONS]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size_diff / 1024:>10.1f}KB {stat.count_diff:>10}  {frame.filename}:{frame.lineno}")
+        for caller in list(stat.traceback)[1:4]:
+            lines.append(f"{'':>24}  from {caller.filename}:{caller.lineno}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------- PAGE PROFILER ----------
+def format_memory(report):
+    lines = [f"{'size':>12}  key"]
+    lines += [f"{size / 1024:>10.1f}KB  {key}" for key, size in report]
+    lines.append(f"{sum(size for _, size in report) / 1024:>10.1f}KB  total")
+    return "\n".join(lines) + "\n"
+
+
+def write_profile(page, stacks, allocations):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    session = st.session_state.setdefault("profile_session", uuid.uuid4().hex[:8])
+    base = os.path.join(PROFILE_DIR, f"{datetime.now():%Y%m%d-%H%M%S-%f}-{page.replace(' ', '_')}-{session}")
+    with open(base + ".folded", "w", encoding="utf-8") as f:
+        f.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    with open(base + ".alloc.txt", "w", encoding="utf-8") as f:
+        f.write(allocations)
+    with open(base + ".state.txt", "w", encoding="utf-8") as f:
+        f.write(format_memory(memory_report()))
+    return base
+
+
+@contextmanager
+def profile_page(page, active=True):
+    """Time the routed page and, when `active`, profile it to disk."""
+    start = time.perf_counter()
+    if not active:
+        try:
+            yield
+        finally:
+            metrics.observe(f"page.{page}", time.perf_counter() - start)
+        return
+
+    start_tracing()
+    before = tracemalloc.take_snapshot()
+    sampler = StackSampler(threading.get_ident())
+    sampler.start()
+    try:
+        yield
+    finally:
+        # Also runs on st.rerun()/st.stop(), which end a page by raising
+        stacks = sampler.stop()
+        elapsed = time.perf_counter() - start
+        metrics.observe(f"page.{page}", elapsed)
+        try:
+            allocations = format_allocations(before, tracemalloc.take_snapshot())
+            base = write_profile(page, stacks, allocations)
+            st.sidebar.caption(f"🔬 {page}: {elapsed * 1000:.0f} ms, profile saved to {base}.*")
+        except OSError as e:
+            st.sidebar.warning(f"⚠️ Could not save profile: {e}")
+        finally:
+            stop_tracing()
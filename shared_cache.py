@@ -0,0 +1,210 @@
+# shared_cache.py
+"""
+Host-wide cache shared by every Streamlit replica on one machine.
+
+st.cache_resource only dedupes inside one server process. This module keeps
+worksheet snapshots in a SQLite file (WAL mode, safe for concurrent
+processes) so that one replica downloads a sheet and the others reuse it.
+
+Every worksheet is a "topic" with a version counter. A replica that writes
+to a sheet calls notify(topic); the others see the new version on their next
+read, drop their local copies and re-read the snapshot. Snapshots are stored
+with the topic version they were read at, so a bumped topic is never served
+from an old snapshot.
+
+Set KISSAN_SHARED_CACHE to choose the file, or to "off" to disable sharing.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+import metrics
+
+# ---------- SETTINGS ----------
+CACHE_PATH = os.environ.get("KISSAN_SHARED_CACHE", os.path.join("cache", "shared_cache.sqlite3"))
+SNAPSHOT_TTL = 60     # seconds a snapshot is served when nobody announced a change
+LEASE_SECONDS = 30    # how long one replica may take to fetch a snapshot for the others
+WAIT_INTERVAL = 0.1   # seconds between checks while another replica is fetching
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY, version INTEGER NOT NULL, value BLOB NOT NULL, expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS topics (topic TEXT PRIMARY KEY, version INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, until REAL NOT NULL);
+"""
+
+
+# ---------- SHARED CACHE ----------
+class SharedCache:
+    """Versioned key/value entries and topic counters in one SQLite file."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.local = threading.local()
+        self.owner = f"{os.getpid()}"
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    # ---------- TOPICS ----------
+    def version(self, topic):
+        row = self._connect().execute("SELECT version FROM topics WHERE topic = ?", (topic,)).fetchone()
+        return row[0] if row else 0
+
+    def notify(self, topic):
+        """Announce that a worksheet changed. Returns the topic's new version."""
+        conn = self._connect()
+        conn.execute("INSERT INTO topics (topic, version) VALUES (?, 1) "
+                     "ON CONFLICT(topic) DO UPDATE SET version = version + 1", (topic,))
+        metrics.incr(f"shared_cache.notify.{topic}")
+        return self.version(topic)
+
+    # ---------- ENTRIES ----------
+    def get(self, key, version):
+        row = self._connect().execute(
+            "SELECT value FROM entries WHERE key = ? AND version = ? AND expires_at > ?",
+            (key, version, time.time())).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def put(self, key, version, value, ttl=SNAPSHOT_TTL):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (key, version, value, expires_at) VALUES (?, ?, ?, ?)",
+            (key, version, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time() + ttl))
+
+    def _acquire(self, key):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("DELETE FROM leases WHERE key = ? AND until < ?", (key, now))
+        return conn.execute("INSERT OR IGNORE INTO leases (key, owner, until) VALUES (?, ?, ?)",
+                            (key, self.owner, now + LEASE_SECONDS)).rowcount == 1
+
+    def _release(self, key):
+        self._connect().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def acquire(self, key, timeout=LEASE_SECONDS):
+        """Wait up to `timeout` seconds for the lease on `key`; TimeoutError if it stays taken."""
+        deadline = time.time() + timeout
+        while not self._acquire(key):
+            if time.time() > deadline:
+                raise TimeoutError(f"{key} is busy, please try again")
+            time.sleep(WAIT_INTERVAL)
+
+    def get_or_compute(self, key, topic, compute, ttl=SNAPSHOT_TTL):
+        """
+        Value for `key` at the current version of `topic`.
+
+        If no replica has it yet, one replica computes it under a lease while
+        the others wait for the stored result (or compute it themselves once
+        the lease runs out).
+        """
+        deadline = time.time() + LEASE_SECONDS
+        while True:
+            version = self.version(topic)
+            value = self.get(key, version)
+            if value is not None:
+                metrics.incr("shared_cache.hits")
+                return value
+            if self._acquire(key) or time.time() > deadline:
+                break
+            time.sleep(WAIT_INTERVAL)
+        metrics.incr("shared_cache.misses")
+        try:
+            value = compute()
+            self.put(key, version, value, ttl)
+        finally:
+            self._release(key)
+        return value
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_cache():
+    if CACHE_PATH.lower() == "off":
+        return None
+    try:
+        return SharedCache(CACHE_PATH)
+    except (OSError, sqlite3.Error):
+        metrics.incr("shared_cache.errors")
+        return None
+
+
+# ---------- HELPERS ----------
+# A broken cache file must never take the app down: every helper falls
+# back to talking to the worksheet directly.
+def topic_version(topic):
+    cache = get_shared_cache()
+    try:
+        return cache.version(topic) if cache else 0
+    except sqlite3.Error:
+        metrics.incr("shared_cache.errors")
+        return 0
+
+
+def notify(topic):
+    """Tell the other replicas that `topic` changed. Returns the new version."""
+    cache = get_shared_cache()
+    try:
+        return cache.notify(topic) if cache else 0
+    except sqlite3.Error:
+        metrics.incr("shared_cache.errors")
+        return 0
+
+
+def shared(key, topic, compute, ttl=SNAPSHOT_TTL):
+    cache = get_shared_cache()
+    if cache is None:
+        return compute()
+    try:
+        return cache.get_or_compute(key, topic, compute, ttl)
+    except sqlite3.Error:
+        metrics.incr("shared_cache.errors")
+        return compute()
+
+
+@contextmanager
+def exclusive(key, timeout=LEASE_SECONDS):
+    """
+    Run a block while holding `key` across every replica on this host.
+    Leases are per process, so callers still need a thread lock as well.
+    """
+    cache = get_shared_cache()
+    held = False
+    if cache is not None:
+        try:
+            cache.acquire(key, timeout)
+            held = True
+        except sqlite3.Error:
+            metrics.incr("shared_cache.errors")
+    try:
+        yield
+    finally:
+        if held:
+            try:
+                cache._release(key)
+            except sqlite3.Error:
+                metrics.incr("shared_cache.errors")
+
+
+def sheet_values(sheet, topic, ttl=SNAPSHOT_TTL):
+    """sheet.get_values() shared across replicas."""
+    return shared(f"values:{topic}", topic, sheet.get_values, ttl)
+
+
+def sheet_records(sheet, topic, ttl=SNAPSHOT_TTL):
+    """sheet.get_all_records() shared across replicas."""
+    return shared(f"records:{topic}", topic, sheet.get_all_records, ttl)
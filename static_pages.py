@@ -0,0 +1,47 @@
+# static_pages.py
+"""
+Fast path for the pages whose content never changes (Home, About, Contact).
+
+Each page is assembled into one HTML string the first time it is served for
+a theme, cached for the process, and emitted as a single st.html element,
+instead of being rebuilt from many st.markdown calls on every rerun.
+"""
+import streamlit as st
+
+# ---------- THEMES ----------
+# Colours the static pages use; dark theme keeps cards readable on a dark background
+THEME_TOKENS = {
+    "light": {
+        "--ak-green": "#2E8B57", "--ak-primary": "#2E86C1", "--ak-accent": "#1F618D",
+        "--ak-text": "#374151", "--ak-body": "#444", "--ak-muted": "#6b7280",
+        "--ak-card": "#F8FFF8", "--ak-card-border": "#D4EED1", "--ak-soft": "#f8f9fa",
+        "--ak-tip": "#EAF7EA", "--ak-border": "#e5e7eb",
+    },
+    "dark": {
+        "--ak-green": "#5FD18F", "--ak-primary": "#6CB4E8", "--ak-accent": "#8CC8F0",
+        "--ak-text": "#E5E7EB", "--ak-body": "#D1D5DB", "--ak-muted": "#9CA3AF",
+        "--ak-card": "#1B2A21", "--ak-card-border": "#2F4A38", "--ak-soft": "#1F2937",
+        "--ak-tip": "#1E3326", "--ak-border": "#374151",
+    },
+}
+
+
+def current_theme():
+    try:
+        return "dark" if st.context.theme.type == "dark" else "light"
+    except Exception:
+        return "light"
+
+
+@st.cache_resource(show_spinner=False)
+def page_html(name, theme, _css, _body):
+    """The complete HTML of one static page for one theme (built once per process)."""
+    tokens = "".join(f"{key}:{value};" for key, value in THEME_TOKENS[theme].items())
+    # Tokens go after the page CSS so an @import can stay first in the stylesheet
+    return f"<style>{_css}\n:root{{{tokens}}}</style>\n{_body}"
+
+
+def render_static(name, page_config, css, body):
+    """Serve a static page: page config plus one cached HTML element."""
+    st.set_page_config(**page_config)
+    st.html(page_html(name, current_theme(), css, body))
@@ -1,3 +1,6 @@
+import sys
+import types
+
 import streamlit as st
 
 # ------------------ SAVE STATE ------------------
@@ -34,4 +37,43 @@ def clear_state(keys=None):
             if k in st.session_state:
                 del st.session_state[k]
     else:
-        st.session_state.clear()
\ No newline at end of file
+        st.session_state.clear()
+
+# ------------------ MEMORY REPORT ------------------
+def deep_size(obj, seen=None):
+    """
+    Approximate bytes held by an object graph (session state values).
+    Objects already counted in `seen` are skipped, so shared ones count once.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (types.ModuleType, types.FunctionType, type)):
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(v, seen) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += deep_size(getattr(obj, slot), seen)
+    return size
+
+
+def memory_report(state=None):
+    """
+    [(key, bytes)] for every session_state key, largest first.
+    Functions and modules are counted as references only.
+    """
+    state = st.session_state if state is None else state
+    report = []
+    for k in list(state.keys()):
+        if k.startswith("$$"):
+            continue  # Streamlit's internal widget ids
+        report.append((k, deep_size(state[k])))
+    return sorted(report, key=lambda item: item[1], reverse=True)
+
@@ -0,0 +1,26 @@
+# conftest.py
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the app modules away from the developer's cache/ and archive/ folders
+SCRATCH = tempfile.mkdtemp(prefix="kissan-tests-")
+os.environ["KISSAN_SHARED_CACHE"] = "off"
+os.environ["KISSAN_MIRROR"] = os.path.join(SCRATCH, "mirror.sqlite3")
+os.environ["KISSAN_ARCHIVE_DIR"] = os.path.join(SCRATCH, "archive")
+
+
+@pytest.fixture
+def shared_cache_file(tmp_path, monkeypatch):
+    """Point shared_cache at a fresh SQLite file for one test."""
+    import shared_cache
+
+    monkeypatch.setattr(shared_cache, "CACHE_PATH", str(tmp_path / "shared_cache.sqlite3"))
+    shared_cache.get_shared_cache.clear()
+    yield shared_cache.get_shared_cache()
+    shared_cache.get_shared_cache.clear()
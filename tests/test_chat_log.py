@@ -0,0 +1,101 @@
+# test_chat_log.py
+import os
+
+import pytest
+
+from chat_log import ChatLog
+
+
+@pytest.fixture
+def log(tmp_path):
+    return ChatLog(str(tmp_path), fsync="never")
+
+
+def questions(log, username, topic):
+    return [entry.question for entry in log.entries(username, topic)]
+
+
+def test_append_and_read_back(log):
+    log.append("asha", "Wheat rust", "2024-01-01 10:00", "q1", "a1")
+    log.append("ravi", "Wheat rust", "2024-01-01 10:01", "other", "x")
+    log.append("asha", "Wheat rust", "2024-01-01 10:02", "q2", "a2")
+    log.append("asha", "Soil", "2024-01-01 10:03", "q3", "a3")
+
+    assert log.topic_counts("asha") == {"Wheat rust": 2, "Soil": 1}
+    entries = log.entries("asha", "Wheat rust")
+    assert [(e.timestamp, e.question, e.answer) for e in entries] == [
+        ("2024-01-01 10:00", "q1", "a1"), ("2024-01-01 10:02", "q2", "a2")]
+    assert log.entries("asha", "Missing") == []
+
+
+def test_records_point_at_their_own_offsets(log):
+    log.append_many([("asha", "t", "ts", f"q{i}", "a") for i in range(5)])
+    offsets = [offset for _, offset, _ in log.index[next(iter(log.index))]["t"]]
+    assert offsets == sorted(set(offsets)) and offsets[0] == 0
+    assert questions(log, "asha", "t") == [f"q{i}" for i in range(5)]
+
+
+def test_second_process_catches_up(log, tmp_path):
+    other = ChatLog(str(tmp_path), fsync="never")
+    log.append("asha", "t", "ts", "q1", "a1")
+    assert questions(other, "asha", "t") == ["q1"]
+    other.append("asha", "t", "ts", "q2", "a2")
+    assert questions(log, "asha", "t") == ["q1", "q2"]
+
+
+def test_segments_roll_over(tmp_path):
+    log = ChatLog(str(tmp_path), fsync="never", segment_bytes=200)
+    log.append_many([("asha", "t", "ts", "x" * 80, "a") for _ in range(6)])
+    assert log.stats()["segments"] > 1
+    assert len(log.entries("asha", "t")) == 6
+
+
+def test_compact_groups_chats_and_drops_old_generation(log, tmp_path):
+    for i in range(3):
+        log.append("asha", "t", "ts", f"a{i}", "x")
+        log.append("ravi", "t", "ts", f"r{i}", "x")
+    reader = ChatLog(str(tmp_path), fsync="never")
+    reader.topic_counts("asha")
+
+    assert log.compact() == 6
+    assert log.generation == 1
+    assert not [n for n in os.listdir(tmp_path) if n.startswith("g0-")]
+    assert questions(log, "asha", "t") == ["a0", "a1", "a2"]
+    # A process that indexed the old generation switches to the new one
+    assert questions(reader, "ravi", "t") == ["r0", "r1", "r2"]
+
+
+def test_torn_index_line_is_skipped(log, tmp_path):
+    log.append("asha", "t", "ts", "q1", "a1")
+    with open(log._index_path(), "ab") as f:
+        f.write(b'["asha", "t", 0, 9\n')  # half a line, then a newline from the next append
+    log.append("asha", "t", "ts", "q2", "a2")
+    assert questions(ChatLog(str(tmp_path), fsync="never"), "asha", "t") == ["q1", "q2"]
+
+
+def test_unfinished_index_line_waits(log):
+    log.append("asha", "t", "ts", "q1", "a1")
+    with open(log._index_path(), "ab") as f:
+        f.write(b'["asha", "t"')  # an append still in progress
+    assert log.topic_counts("asha") == {"t": 1}
+
+
+def test_lost_record_data_is_skipped(log):
+    log.append("asha", "t", "ts", "q1", "a1")
+    log.append("asha", "t", "ts", "q2", "a2")
+    path = log._segment_path(0)
+    size = os.path.getsize(path)
+    first = log.index[next(iter(log.index))]["t"][0][2]
+
+    # The second record was zeroed by a crash: it cannot be parsed
+    with open(path, "r+b") as f:
+        f.seek(first)
+        f.write(b"\0" * (size - first))
+    assert questions(log, "asha", "t") == ["q1"]
+
+    # The second record never reached the disk: the file is cut short
+    with open(path, "r+b") as f:
+        f.truncate(first + 5)
+    assert questions(log, "asha", "t") == ["q1"]
+    assert log.compact() == 1
+    assert questions(log, "asha", "t") == ["q1"]
@@ -0,0 +1,76 @@
+# test_mirror.py
+import pytest
+
+import mirror
+from mock_sheets import WORKBOOK_HEADERS, MemoryWorksheet
+
+
+@pytest.mark.parametrize("a1, expected", [
+    ("A1", (1, 1, 1, 1)),
+    ("C7", (7, 3, 7, 3)),
+    ("A2:J", (2, 1, None, 10)),
+    ("C2:C5", (2, 3, 5, 3)),
+    ("A:A", (1, 1, None, 1)),
+    ("2:4", (2, 1, 4, None)),
+    ("AA10:AB12", (10, 27, 12, 28)),
+    ("'Sheet5'!b3:d4", (3, 2, 4, 4)),
+    ("ai data!A1:E", (1, 1, None, 5)),
+    ("Sheet5!", (1, 1, None, None)),
+])
+def test_parse_range(a1, expected):
+    assert mirror.parse_range(a1) == expected
+
+
+@pytest.mark.parametrize("a1", ["A1:B2:C3", "1A", "A-1", "R1C1"])
+def test_parse_range_rejects_unsupported_ranges(a1):
+    with pytest.raises(ValueError):
+        mirror.parse_range(a1)
+
+
+@pytest.fixture
+def market(tmp_path, monkeypatch):
+    """Sheet5 with three listings, mirrored into a fresh store."""
+    store = mirror.MirrorStore(str(tmp_path / "mirror.sqlite3"))
+    monkeypatch.setattr(mirror, "_store", [store])
+    sheet = MemoryWorksheet("Sheet5", WORKBOOK_HEADERS["Sheet5"], [
+        ["asha", "Wheat", 10, 20, "Pune", "", "", "L1", 0, ""],
+        ["ravi", "Rice", 5, 30, "Nashik", "", "", "L2", 0, ""],
+        ["meena", "Onion", 0, 12, "Pune", "", "", "L3", 0, ""],
+    ])
+    mirror.sync_sheet(store, sheet)
+    return sheet, mirror.mirrored(sheet), store
+
+
+@pytest.mark.parametrize("a1", ["A1", "A2:J", "C2:C4", "A2:A3", "B3:D3", "A1:J1", "C2:C9", "A5:J", "H2:L3"])
+def test_mirror_reads_match_the_sheet(market, a1):
+    sheet, mirrored, _ = market
+    assert mirrored.get_values(a1) == sheet.get_values(a1)
+    assert mirrored.batch_get([a1, "A1"]) == sheet.batch_get([a1, "A1"])
+
+
+def test_whole_sheet_reads_come_from_the_mirror(market):
+    sheet, mirrored, _ = market
+    sheet.update_cell(2, 3, 99)  # changed behind the mirror's back
+    assert mirrored.get_values()[1][2] == "10"
+    assert mirrored.col_values(3) == ["Quantity (kg)", "10", "5", "0"]
+    assert mirrored.get_all_records()[0]["Quantity (kg)"] == 10
+    assert mirror.live(mirrored).get_values("C2") == [["99"]]
+
+
+def test_writes_go_through_to_the_mirror(market):
+    sheet, mirrored, _ = market
+    mirrored.update_cell(2, 3, 7)
+    mirrored.append_row(["kiran", "Maize", 8, 15, "Satara", "", "", "L4", 0, ""])
+    assert mirrored.get_values("C2") == [["7"]]
+    assert mirrored.get_values("A5:B5") == [["kiran", "Maize"]]
+    assert mirrored.get_values("A2:J") == sheet.get_values("A2:J")
+
+
+def test_deleted_rows_fall_back_to_the_live_sheet(market):
+    sheet, mirrored, store = market
+    mirrored.delete_rows(2)
+    assert not store.fresh("Sheet5")
+    assert mirrored.get_values("A2:A") == [["ravi"], ["meena"]]
+    mirror.sync_sheet(store, sheet)
+    assert store.fresh("Sheet5")
+    assert mirrored.get_values("A2:A") == [["ravi"], ["meena"]]
@@ -0,0 +1,153 @@
+# test_orders.py
+import threading
+
+import pytest
+
+import orders
+from mock_sheets import WORKBOOK_HEADERS, MemoryWorksheet
+
+
+def listing_row(quantity=10, listing_id="L1"):
+    return ["farmer", "Wheat", quantity, 20, "Pune", "", "", listing_id, 0, ""]
+
+
+@pytest.fixture
+def sheets():
+    orders.read_orders.clear()
+    orders._headers_checked.clear()  # checked once per process, and every test has a new Sheet6
+    market = MemoryWorksheet("Sheet5", WORKBOOK_HEADERS["Sheet5"], [listing_row()])
+    sheet6 = MemoryWorksheet("Sheet6", WORKBOOK_HEADERS["Sheet6"])
+    yield market, sheet6
+    orders.read_orders.clear()
+
+
+def listing(market):
+    values = market.get_values("A2:J2")[0]
+    record = dict(zip(WORKBOOK_HEADERS["Sheet5"], values))
+    record["_row"] = 2
+    return record
+
+
+def stock(market):
+    return orders.to_int(market.get_values("C2")[0][0])
+
+
+def order(sheet6, order_id):
+    orders.read_orders.clear()
+    return orders.load_orders(sheet6).get(order_id)
+
+
+def buy(market, sheet6, quantity):
+    ok, message, remaining = orders.place_order(market, sheet6, listing(market), quantity, "buyer", "b@x", "Pickup")
+    order_id = message.split()[1] if ok else None
+    return ok, order_id, remaining
+
+
+def test_place_order_reserves_stock(sheets):
+    market, sheet6 = sheets
+    ok, order_id, remaining = buy(market, sheet6, 4)
+    assert ok and remaining == 6
+    assert stock(market) == 6
+    placed = order(sheet6, order_id)
+    assert placed["Status"] == "Pending"
+    assert placed["Listing ID"] == "L1" and placed["Listing Row"] == 2
+
+
+def test_place_order_refuses_more_than_available(sheets):
+    market, sheet6 = sheets
+    ok, _, remaining = buy(market, sheet6, 11)
+    assert not ok and remaining == 10
+    assert stock(market) == 10
+
+
+def test_place_order_refuses_a_replaced_listing(sheets):
+    market, sheet6 = sheets
+    selected = listing(market)
+    market.update_cell(2, 8, "L2")
+    ok, message, _ = orders.place_order(market, sheet6, selected, 1, "buyer", "b@x", "Pickup")
+    assert not ok and "changed" in message
+
+
+def test_reject_releases_stock_once(sheets):
+    market, sheet6 = sheets
+    _, order_id, _ = buy(market, sheet6, 4)
+    pending = order(sheet6, order_id)
+    assert orders.reject_order(sheet6, market, pending) == (True, 10)
+    # A second reject from a stale snapshot must not give the stock back again
+    assert orders.reject_order(sheet6, market, pending) == (False, None)
+    assert stock(market) == 10
+    assert order(sheet6, order_id)["Status"] == "Rejected"
+
+
+def test_reject_after_accept_keeps_stock(sheets):
+    market, sheet6 = sheets
+    _, order_id, _ = buy(market, sheet6, 4)
+    pending = order(sheet6, order_id)
+    assert orders.accept_order(sheet6, pending, "Accepted (Pickup)")
+    assert orders.reject_order(sheet6, market, pending) == (False, None)
+    assert not orders.accept_order(sheet6, pending, "Accepted (Home Delivery)")
+    assert stock(market) == 6
+    assert order(sheet6, order_id)["Status"] == "Accepted (Pickup)"
+
+
+def test_accept_writes_details(sheets):
+    market, sheet6 = sheets
+    _, order_id, _ = buy(market, sheet6, 1)
+    assert orders.accept_order(sheet6, order(sheet6, order_id), "Accepted (Courier)", {9: "DHL", 10: "T1"})
+    accepted = order(sheet6, order_id)
+    assert (accepted["Status"], accepted["Courier Company"], accepted["Tracking Number"]) == \
+        ("Accepted (Courier)", "DHL", "T1")
+
+
+def test_reject_checks_the_row_still_holds_the_order(sheets):
+    market, sheet6 = sheets
+    _, order_id, _ = buy(market, sheet6, 4)
+    pending = order(sheet6, order_id)
+    sheet6.update_cell(2, 1, "someone-else")
+    assert orders.reject_order(sheet6, market, pending) == (False, None)
+    assert stock(market) == 6
+
+
+class FlakyAppend(MemoryWorksheet):
+    """append_row raises; with `lands`, only after the row was written (a timeout)."""
+
+    def __init__(self, lands):
+        super().__init__("Sheet6", WORKBOOK_HEADERS["Sheet6"])
+        self.lands = lands
+
+    def append_row(self, values, **kwargs):
+        if self.lands:
+            super().append_row(values, **kwargs)
+        raise TimeoutError("Sheets did not answer")
+
+
+def test_failed_append_restores_stock(sheets):
+    market, _ = sheets
+    with pytest.raises(TimeoutError):
+        buy(market, FlakyAppend(lands=False), 4)
+    assert stock(market) == 10
+
+
+def test_append_that_landed_keeps_reservation(sheets):
+    market, _ = sheets
+    sheet6 = FlakyAppend(lands=True)
+    ok, order_id, remaining = buy(market, sheet6, 4)
+    assert ok and remaining == 6
+    assert stock(market) == 6
+    assert order(sheet6, order_id)["Quantity"] == 4
+
+
+def test_concurrent_orders_never_oversell(sheets):
+    market, sheet6 = sheets
+    results = []
+
+    def attempt():
+        results.append(buy(market, sheet6, 3)[0])
+
+    threads = [threading.Thread(target=attempt) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 3
+    assert stock(market) == 1
@@ -0,0 +1,126 @@
+# test_shared_cache.py
+import threading
+import time
+
+import pytest
+
+import shared_cache
+
+
+def test_notify_bumps_topic_version(shared_cache_file):
+    assert shared_cache.topic_version("Sheet5") == 0
+    assert shared_cache.notify("Sheet5") == 1
+    assert shared_cache.notify("Sheet5") == 2
+    assert shared_cache.topic_version("Sheet5") == 2
+    assert shared_cache.topic_version("Sheet6") == 0
+
+
+def test_snapshot_is_reused_until_topic_changes(shared_cache_file):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return [["row", len(calls)]]
+
+    assert shared_cache.shared("values:Sheet5", "Sheet5", compute) == [["row", 1]]
+    assert shared_cache.shared("values:Sheet5", "Sheet5", compute) == [["row", 1]]
+    shared_cache.notify("Sheet5")
+    assert shared_cache.shared("values:Sheet5", "Sheet5", compute) == [["row", 2]]
+    assert len(calls) == 2
+
+
+def test_expired_snapshot_is_recomputed(shared_cache_file):
+    calls = []
+    shared_cache.shared("k", "t", lambda: calls.append(1) or "v", ttl=-1)
+    shared_cache.shared("k", "t", lambda: calls.append(1) or "v", ttl=-1)
+    assert len(calls) == 2
+
+
+def test_concurrent_readers_compute_once(shared_cache_file, tmp_path):
+    started = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.3)
+        return "snapshot"
+
+    results = []
+    # Each SharedCache has its own owner, like one replica per process
+    caches = [shared_cache.SharedCache(str(tmp_path / "shared_cache.sqlite3")) for _ in range(4)]
+    for i, cache in enumerate(caches):
+        cache.owner = f"replica-{i}"
+    threads = [threading.Thread(target=lambda c=c: results.append(c.get_or_compute("k", "t", compute)))
+               for c in caches]
+    threads[0].start()
+    started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["snapshot"] * 4
+    assert len(calls) == 1
+
+
+def test_compute_error_releases_the_lease(shared_cache_file):
+    with pytest.raises(RuntimeError):
+        shared_cache.shared("k", "t", lambda: (_ for _ in ()).throw(RuntimeError("sheet down")))
+    assert shared_cache.shared("k", "t", lambda: "v") == "v"
+
+
+def test_acquire_times_out_while_another_replica_holds_the_key(shared_cache_file, tmp_path):
+    other = shared_cache.SharedCache(str(tmp_path / "shared_cache.sqlite3"))
+    other.owner = "other-replica"
+    other.acquire("listing:2")
+    with pytest.raises(TimeoutError):
+        shared_cache_file.acquire("listing:2", timeout=0.2)
+    other._release("listing:2")
+    shared_cache_file.acquire("listing:2", timeout=0.2)
+    shared_cache_file._release("listing:2")
+
+
+def test_leases_serialize_replicas(shared_cache_file, tmp_path):
+    inside, overlaps = [], []
+
+    def worker(owner):
+        cache = shared_cache.SharedCache(str(tmp_path / "shared_cache.sqlite3"))
+        cache.owner = owner
+        cache.acquire("listing:2")
+        try:
+            if inside:
+                overlaps.append(owner)
+            inside.append(owner)
+            time.sleep(0.05)
+            inside.remove(owner)
+        finally:
+            cache._release("listing:2")
+
+    threads = [threading.Thread(target=worker, args=(f"replica-{i}",)) for i in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert overlaps == []
+
+
+def test_exclusive_releases_the_key_afterwards(shared_cache_file):
+    with shared_cache.exclusive("listing:2"):
+        with pytest.raises(TimeoutError):
+            with shared_cache.exclusive("listing:2", timeout=0.2):
+                pass
+    with shared_cache.exclusive("listing:2", timeout=0.2):
+        pass
+
+
+def test_helpers_fall_back_when_sharing_is_off(monkeypatch):
+    monkeypatch.setattr(shared_cache, "CACHE_PATH", "off")
+    shared_cache.get_shared_cache.clear()
+    try:
+        assert shared_cache.topic_version("Sheet5") == 0
+        assert shared_cache.notify("Sheet5") == 0
+        assert shared_cache.shared("k", "t", lambda: "direct") == "direct"
+        with shared_cache.exclusive("listing:2"):
+            pass
+    finally:
+        shared_cache.get_shared_cache.clear()
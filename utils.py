@@ -4,6 +4,7 @@ import streamlit as st
 from datetime import datetime
 import uuid
 from oauth2client.service_account import ServiceAccountCredentials
+from mirror import mirrored
 
 # ---------- SCOPE ----------
 SCOPE = [
@@ -24,7 +25,7 @@ def connect_gsheet():
         creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
         client = gspread.authorize(creds)
         # Change these names to your spreadsheet & worksheet
-        return client.open("User").worksheet("Sheet3")
+        return mirrored(client.open("User").worksheet("Sheet3"))
     except Exception as e:
         st.warning(f"⚠️ Could not connect to Google Sheets: {e}")
         return None